@@ -1,14 +1,98 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.config.environments import env
 from app.config.logs import logger
+from app.config.metrics import metrics
 
 engine = create_engine(
     env.DATABASE_URL,
-    echo=False
+    echo=False,
+    pool_size=env.DB_POOL_SIZE,
+    max_overflow=env.DB_MAX_OVERFLOW,
+    pool_timeout=env.DB_POOL_TIMEOUT,
+    pool_recycle=env.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    # Keepalive TCP do libpq: evita que conexões ociosas do pool caiam no link com o banco
+    connect_args={
+        "connect_timeout": env.DB_CONNECT_TIMEOUT,
+        "keepalives": 1,
+        "keepalives_idle": env.DB_KEEPALIVES_IDLE,
+        "keepalives_interval": 10,
+        "keepalives_count": 5,
+    },
 )
 
-Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@event.listens_for(engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info["statement_started"] = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("statement_started", None)
+    if started is None:
+        return
+    # Rótulo pela operação (select, insert, update, delete, with...) para manter poucas séries
+    operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "unknown"
+    metrics.observe("db_statement_seconds", time.perf_counter() - started, "Duração dos comandos SQL", operation=operation)
+
+
+SessionFactory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+_scope = threading.local()
+
+
+def Session():
+    """
+    Abre uma sessão. Dentro de `unit_of_work()` todas as sessões da thread usam a mesma conexão
+    do pool (aberta no primeiro uso), de forma que commit/close das funções de app/database
+    não devolvem nem reabrem conexões a cada chamada.
+    """
+    if not getattr(_scope, "active", False):
+        return SessionFactory()
+    if _scope.connection is None or _scope.connection.invalidated:
+        if _scope.connection is not None:
+            _scope.connection.close()
+        _scope.connection = engine.connect()
+    return SessionFactory(bind=_scope.connection)
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Escopo de banco de uma etapa do pipeline: uma conexão por thread durante toda a etapa.
+    Escopos aninhados reaproveitam o escopo externo.
+    """
+    if getattr(_scope, "active", False):
+        yield
+        return
+    _scope.active = True
+    _scope.connection = None
+    try:
+        yield
+    finally:
+        connection, _scope.connection, _scope.active = _scope.connection, None, False
+        if connection is not None:
+            connection.close()
+
+
+@contextmanager
+def streaming_session():
+    """
+    Sessão própria (fora do escopo da etapa) para leituras longas com cursor no servidor,
+    que não podem ser interrompidas pelos commits das escritas feitas em paralelo.
+    """
+    db = SessionFactory()
+    try:
+        yield db
+    finally:
+        db.close()
+
 
 def test_connection():
     try:
@@ -17,4 +101,4 @@ def test_connection():
             return True
     except Exception as e:
         logger.error(f"❌ Erro ao conectar ao banco de dados: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -9,12 +9,94 @@ class Environments:
     BING_NEWS_API_KEY = os.getenv("BING_NEWS_API_KEY")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     ALERTA_LICITACAO_API_KEY = os.getenv("ALERTA_LICITACAO_API_KEY")
+    # Endpoints alternativos (ex.: servidores locais do benchmark offline); vazio usa o serviço real
+    SERPAPI_BASE_URL = os.getenv("SERPAPI_BASE_URL") or None
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
     
     # E-mail
     MAIL_USER = os.getenv("MAIL_USER")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+    MAIL_FROM = os.getenv("MAIL_FROM") or MAIL_USER
+    MAIL_SMTP_HOST = os.getenv("MAIL_SMTP_HOST", "smtp.gmail.com")
+    MAIL_SMTP_PORT = int(os.getenv("MAIL_SMTP_PORT", "587"))
+    MAIL_SMTP_STARTTLS = os.getenv("MAIL_SMTP_STARTTLS", "true").lower() == "true"
+    MAIL_SMTP_AUTH = os.getenv("MAIL_SMTP_AUTH", "true").lower() == "true"
+    MAIL_SMTP_TIMEOUT = int(os.getenv("MAIL_SMTP_TIMEOUT", "30"))
+    MAIL_SMTP_POOL_SIZE = int(os.getenv("MAIL_SMTP_POOL_SIZE", "3"))
+    MAIL_RATE_PER_SECOND = float(os.getenv("MAIL_RATE_PER_SECOND", "5"))
+    MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", "3"))
+    MAIL_BACKOFF_SECONDS = float(os.getenv("MAIL_BACKOFF_SECONDS", "2"))
 
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL")
+    DB_BULK_CHUNK_SIZE = int(os.getenv("DB_BULK_CHUNK_SIZE", "500"))
+    DB_STREAM_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", "500"))
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+    DB_KEEPALIVES_IDLE = int(os.getenv("DB_KEEPALIVES_IDLE", "30"))
+
+    # OpenAI
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+    LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL_DAYS = int(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000"))
+
+    # Classificação
+    CLASSIFY_FLUSH_SIZE = int(os.getenv("CLASSIFY_FLUSH_SIZE", "50"))
+    CLASSIFY_BATCH_TOKEN_BUDGET = int(os.getenv("CLASSIFY_BATCH_TOKEN_BUDGET", "8000"))
+    CLASSIFY_CONTENT_TOKENS = int(os.getenv("CLASSIFY_CONTENT_TOKENS", "600"))
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+    PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "true").lower() == "true"
+    PREFILTER_REJECT_THRESHOLD = float(os.getenv("PREFILTER_REJECT_THRESHOLD", "0.05"))
+    PREFILTER_MIN_TRAINING_SAMPLES = int(os.getenv("PREFILTER_MIN_TRAINING_SAMPLES", "200"))
+    PREFILTER_MAX_TRAINING_SAMPLES = int(os.getenv("PREFILTER_MAX_TRAINING_SAMPLES", "5000"))
+
+    # Agrupamento
+    CLUSTER_SIMILARITY_THRESHOLD = float(os.getenv("CLUSTER_SIMILARITY_THRESHOLD", "0.3"))
+    GROUPING_MAX_ITEMS_PER_PROMPT = int(os.getenv("GROUPING_MAX_ITEMS_PER_PROMPT", "80"))
+    SUMMARY_CONTENT_TOKENS = int(os.getenv("SUMMARY_CONTENT_TOKENS", "150"))
+    SUMMARY_PROMPT_TOKENS = int(os.getenv("SUMMARY_PROMPT_TOKENS", "3000"))
+
+    # Pipeline
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "100"))
+
+    # Buscas
+    SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "8"))
+    SEARCH_MAX_RETRIES = int(os.getenv("SEARCH_MAX_RETRIES", "3"))
+    SEARCH_BACKOFF_SECONDS = float(os.getenv("SEARCH_BACKOFF_SECONDS", "1"))
+    SEARCH_RATE_LIMIT_GOOGLE = float(os.getenv("SEARCH_RATE_LIMIT_GOOGLE", "5"))
+    SEARCH_RATE_LIMIT_BING = float(os.getenv("SEARCH_RATE_LIMIT_BING", "5"))
+    SEARCH_RATE_LIMIT_ALERTA = float(os.getenv("SEARCH_RATE_LIMIT_ALERTA", "2"))
+    SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "6"))
+    SEARCH_MAX_PAGES = int(os.getenv("SEARCH_MAX_PAGES", "1"))
+    SEARCH_WATERMARKS_ENABLED = os.getenv("SEARCH_WATERMARKS_ENABLED", "true").lower() == "true"
+    SEARCH_WATERMARK_OVERLAP_HOURS = float(os.getenv("SEARCH_WATERMARK_OVERLAP_HOURS", "2"))
+
+    # Crawler
+    EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", "8"))
+    EXTRACTION_MAX_PER_DOMAIN = int(os.getenv("EXTRACTION_MAX_PER_DOMAIN", "2"))
+    EXTRACTION_TIMEOUT = int(os.getenv("EXTRACTION_TIMEOUT", "20"))
+    BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+    BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "50"))
+
+    # Cache de HTML
+    HTML_CACHE_ENABLED = os.getenv("HTML_CACHE_ENABLED", "true").lower() == "true"
+    HTML_CACHE_DIR = os.getenv("HTML_CACHE_DIR", ".cache/html")
+    HTML_CACHE_FRESH_HOURS = float(os.getenv("HTML_CACHE_FRESH_HOURS", "12"))
+    HTML_CACHE_MAX_AGE_DAYS = float(os.getenv("HTML_CACHE_MAX_AGE_DAYS", "30"))
+    HTML_CACHE_MAX_MB = int(os.getenv("HTML_CACHE_MAX_MB", "500"))
+    HTML_CACHE_ZSTD_LEVEL = int(os.getenv("HTML_CACHE_ZSTD_LEVEL", "10"))
+
+    # Métricas
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_DIR = os.getenv("METRICS_DIR", ".metrics")
     
 env = Environments()
\ No newline at end of file
@@ -0,0 +1,304 @@
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from app.config.environments import env
+from app.config.logs import logger
+
+
+PREFIX = "news_bot_"
+
+# Limites (em segundos) dos histogramas de latência: de consultas rápidas ao banco até renderizações do Selenium
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+PROFILE_TOP_FUNCTIONS = 40
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimativa do quantil pelo limite superior do bucket (o último bucket usa o máximo observado).
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    Métricas da execução em memória: contadores, gauges e histogramas de latência com rótulos.
+    Seguro para uso entre threads. Ao final da execução `write_report()` grava um arquivo no formato
+    textfile do Prometheus (para o node_exporter) e um relatório JSON da execução.
+    Com `enable_profiling()`, `stage()`/`profiled()` também coletam cProfile por etapa.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._help = {}
+        self._profiles = {}
+        self.profiling = False
+        self.status = "success"
+        self.started_at = time.time()
+
+    def _describe(self, name, description):
+        if description and name not in self._help:
+            self._help[name] = description
+
+    def inc(self, name, value=1, description=None, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._describe(name, description)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, description=None, **labels):
+        with self._lock:
+            self._describe(name, description)
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name, seconds, description=None, buckets=DEFAULT_BUCKETS, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._describe(name, description)
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, description=None, **labels):
+        """
+        Mede a duração do bloco no histograma `name` (também quando o bloco levanta exceção).
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, description, **labels)
+
+    def enable_profiling(self):
+        self.profiling = True
+
+    def mark_failed(self):
+        self.status = "error"
+
+    @contextmanager
+    def profiled(self, name):
+        """
+        Coleta cProfile do bloco na thread atual, somado aos demais perfis da mesma etapa.
+        """
+        if not self.profiling:
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Python 3.12+: só um profiler ativo por vez no interpretador (etapas em threads concorrentes)
+            logger.warning(f"cProfile indisponível para a etapa '{name}': {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiles.setdefault(name, []).append(profile)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Etapa de uma execução: duração no histograma de etapas e, com profiling ativo, cProfile próprio.
+        """
+        with self.timer("stage_seconds", "Duração de cada etapa da execução", stage=name), self.profiled(name):
+            yield
+
+    def reset(self):
+        """
+        Descarta as métricas coletadas (usado pelo benchmark para medir cada etapa isoladamente).
+        """
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._profiles.clear()
+        self.status = "success"
+        self.started_at = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                    for name, series in sorted(self._counters.items())
+                },
+                "gauges": {
+                    name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                    for name, series in sorted(self._gauges.items())
+                },
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(key),
+                            "count": h.count,
+                            "sum": round(h.sum, 6),
+                            "max": round(h.max, 6),
+                            "p50": h.quantile(0.5),
+                            "p95": h.quantile(0.95),
+                        }
+                        for key, h in series.items()
+                    ]
+                    for name, series in sorted(self._histograms.items())
+                },
+            }
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(metrics.items()):
+                    full_name = PREFIX + name + ("_total" if kind == "counter" else "")
+                    if name in self._help:
+                        lines.append(f"# HELP {full_name} {self._help[name]}")
+                    lines.append(f"# TYPE {full_name} {kind}")
+                    for key, value in sorted(series.items()):
+                        lines.append(f"{full_name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                full_name = PREFIX + name
+                if name in self._help:
+                    lines.append(f"# HELP {full_name} {self._help[name]}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        lines.append(f"{full_name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{full_name}_bucket{_format_labels(key, [('le', '+Inf')])} {h.count}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def _write_profiles(self, directory, run):
+        paths = []
+        with self._lock:
+            profiles = dict(self._profiles)
+        for name, stage_profiles in profiles.items():
+            slug = "".join(c if c.isascii() and c.isalnum() else "_" for c in name.lower())
+            path = os.path.join(directory, f"{run}-profile-{slug}")
+            stats = pstats.Stats(*stage_profiles)
+            stats.dump_stats(f"{path}.prof")
+            summary = io.StringIO()
+            pstats.Stats(f"{path}.prof", stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            with open(f"{path}.txt", "w", encoding="utf-8") as f:
+                f.write(summary.getvalue())
+            paths.append(f"{path}.prof")
+        return paths
+
+    def write_report(self, run, directory=None):
+        """
+        Grava `<run>.prom` (textfile do Prometheus), `<run>.json` (relatório da execução) e,
+        com profiling ativo, `<run>-profile-<etapa>.prof/.txt`. Retorna o caminho do JSON.
+        """
+        directory = directory or env.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        finished_at = time.time()
+        self.set("run_duration_seconds", finished_at - self.started_at, "Duração total da execução", run=run)
+        self.set("run_success", 1 if self.status == "success" else 0, "1 se a execução terminou sem erro", run=run)
+        self.set("run_finished_timestamp_seconds", finished_at, "Horário (epoch) do fim da execução", run=run)
+
+        # Escrita atômica: o node_exporter nunca lê um arquivo pela metade
+        prometheus_path = os.path.join(directory, f"{run}.prom")
+        with open(f"{prometheus_path}.tmp", "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(f"{prometheus_path}.tmp", prometheus_path)
+
+        report = {
+            "run": run,
+            "status": self.status,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "finished_at": datetime.fromtimestamp(finished_at, timezone.utc).isoformat(),
+            "duration_seconds": round(finished_at - self.started_at, 3),
+            "profiles": self._write_profiles(directory, run) if self.profiling else [],
+            **self.snapshot(),
+        }
+        json_path = os.path.join(directory, f"{run}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        logger.info(f"Métricas da execução gravadas em {prometheus_path} e {json_path}.")
+        return json_path
+
+
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def metrics_run(run, profile=False):
+    """
+    Envolve uma execução completa (main.py ou um schedule): ao sair, com ou sem erro, grava o relatório.
+    Erros tratados dentro do bloco devem chamar `metrics.mark_failed()`.
+    """
+    if profile:
+        metrics.enable_profiling()
+    try:
+        yield metrics
+    except BaseException:
+        metrics.mark_failed()
+        raise
+    finally:
+        if env.METRICS_ENABLED:
+            try:
+                metrics.write_report(run)
+            except Exception as e:
+                logger.error(f"Erro ao gravar as métricas da execução: {e}")
+
+
+def parse_run_arguments(description):
+    """
+    Argumentos comuns dos pontos de entrada. `--profile` grava também o cProfile de cada etapa.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--profile", action="store_true", help="Grava o cProfile de cada etapa junto com as métricas (METRICS_DIR)")
+    return parser.parse_args()
@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.config.database import Session
+from app.config.environments import env
+from app.config.logs import logger
+
+
+LLM_CACHE_LOOKUP_QUERY = text("""
+    UPDATE llm_cache SET last_hit_at = :now
+    WHERE cache_key = ANY(:cache_keys) AND created_at >= :min_created_at
+    RETURNING cache_key, payload
+""")
+
+
+def get_cached_responses(cache_keys):
+    """
+    Busca respostas em cache ainda dentro do TTL e marca o último acesso.
+    Retorna dict cache_key -> payload.
+    """
+    if not cache_keys:
+        return {}
+    db = Session()
+    min_created_at = datetime.now() - timedelta(days=env.LLM_CACHE_TTL_DAYS)
+    try:
+        result = db.execute(LLM_CACHE_LOOKUP_QUERY, {"now": datetime.now(), "cache_keys": list(cache_keys), "min_created_at": min_created_at})
+        cached = {row[0]: json.loads(row[1]) for row in result}
+        db.commit()
+        return cached
+    except Exception as e:
+        logger.error(f"Erro ao buscar respostas no cache da IA: {e}")
+        db.rollback()
+        return {}
+    finally:
+        db.close()
+
+
+def save_cached_responses(entries):
+    """
+    Grava (ou renova) respostas no cache. Recebe dict cache_key -> payload.
+    """
+    if not entries:
+        return
+    db = Session()
+    query = text("""
+        INSERT INTO llm_cache (cache_key, payload, created_at, last_hit_at)
+        VALUES (:cache_key, :payload, :now, :now)
+        ON CONFLICT (cache_key) DO UPDATE SET payload = EXCLUDED.payload, created_at = EXCLUDED.created_at, last_hit_at = EXCLUDED.last_hit_at
+    """)
+    now = datetime.now()
+    try:
+        db.execute(query, [
+            {"cache_key": key, "payload": json.dumps(payload, ensure_ascii=False), "now": now}
+            for key, payload in entries.items()
+        ])
+        db.commit()
+    except Exception as e:
+        logger.error(f"Erro ao gravar respostas no cache da IA: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+LLM_CACHE_EXPIRED_QUERY = text("DELETE FROM llm_cache WHERE created_at < :min_created_at")
+
+LLM_CACHE_OVERFLOW_QUERY = text("""
+    DELETE FROM llm_cache WHERE cache_key IN (
+        SELECT cache_key FROM llm_cache ORDER BY last_hit_at DESC OFFSET :max_entries
+    )
+""")
+
+
+def evict_llm_cache():
+    """
+    Remove entradas expiradas (TTL) e, acima do limite de tamanho, as menos usadas recentemente.
+    """
+    db = Session()
+    min_created_at = datetime.now() - timedelta(days=env.LLM_CACHE_TTL_DAYS)
+    try:
+        expired = db.execute(LLM_CACHE_EXPIRED_QUERY, {"min_created_at": min_created_at})
+        overflow = db.execute(LLM_CACHE_OVERFLOW_QUERY, {"max_entries": env.LLM_CACHE_MAX_ENTRIES})
+        db.commit()
+        if expired.rowcount or overflow.rowcount:
+            logger.info(f"Cache da IA: {expired.rowcount} entradas expiradas e {overflow.rowcount} excedentes removidas.")
+    except Exception as e:
+        logger.error(f"Erro ao limpar o cache da IA: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,92 @@
+import importlib.util
+import re
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.config.database import engine
+from app.config.logs import logger
+
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "db" / "migrations"
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+# Chave do advisory lock que impede duas execuções simultâneas de aplicarem migrações
+MIGRATION_LOCK_ID = 4217001
+
+
+def list_migrations(directory=MIGRATIONS_DIR):
+    """
+    Lista as migrações de db/migrations no formato NNNN_descricao.sql (ou .py, para migrações de dados
+    que precisam de Python: funções `upgrade(conn)`), em ordem de versão.
+    Retorna lista de tuplas (version, name, path).
+    """
+    migrations = []
+    for path in sorted(Path(directory).glob("*.*")):
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if match:
+            migrations.append((match.group(1), match.group(2), path))
+    return migrations
+
+
+def get_applied_versions(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(10) PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    conn.commit()
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def _run_migration(conn, path):
+    if path.suffix == ".py":
+        spec = importlib.util.spec_from_file_location(f"migration_{path.stem}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.upgrade(conn)
+        return
+    # SQL enviado como está ao driver (sem parâmetros), para aceitar vários comandos por arquivo
+    conn.exec_driver_sql(path.read_text(encoding="utf-8"), execution_options={"no_parameters": True})
+
+
+def apply_migrations(dry_run=False):
+    """
+    Aplica, em ordem, as migrações ainda não registradas em schema_migrations.
+    Cada migração roda em sua própria transação; uma falha interrompe as seguintes.
+    Retorna a lista de versões aplicadas (ou pendentes, com dry_run=True).
+    """
+    applied_now = []
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+        conn.commit()
+        try:
+            applied = get_applied_versions(conn)
+            for version, name, path in list_migrations():
+                if version in applied:
+                    continue
+                if dry_run:
+                    logger.info(f"Migração pendente: {version}_{name}")
+                    applied_now.append(version)
+                    continue
+                logger.info(f"Aplicando migração {version}_{name}...")
+                with conn.begin():
+                    _run_migration(conn, path)
+                    conn.execute(
+                        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                        {"version": version, "name": name},
+                    )
+                applied_now.append(version)
+            if not applied_now:
+                logger.info("Banco de dados já está na versão mais recente.")
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+            conn.commit()
+    return applied_now
+
+
+if __name__ == "__main__":
+    import sys
+
+    apply_migrations(dry_run="--dry-run" in sys.argv)
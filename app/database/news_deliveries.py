@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.config.database import Session
+from app.config.logs import logger
+
+
+def get_delivered_news(news_ids):
+    """
+    Busca as entregas já concluídas das notícias informadas: enviadas ou recusadas de forma definitiva
+    ('bounced'), que não devem ser tentadas de novo.
+    Retorna dict recipient_email -> conjunto de ids de relevant_news já entregues.
+    Levanta a exceção em caso de erro no banco, para não reenviar tudo a todos os destinatários.
+    """
+    if not news_ids:
+        return {}
+    db = Session()
+    query = text("""
+        SELECT recipient_email, relevant_news_id FROM news_deliveries
+        WHERE relevant_news_id = ANY(:news_ids) AND status IN ('sent', 'bounced')
+    """)
+    try:
+        delivered = {}
+        for email, news_id in db.execute(query, {"news_ids": list(news_ids)}):
+            delivered.setdefault(email, set()).add(news_id)
+        return delivered
+    except Exception as e:
+        logger.error(f"Erro ao buscar entregas da newsletter: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def record_deliveries(entries):
+    """
+    Grava o resultado das entregas. Recebe lista de dicts {'news_id', 'email', 'status', 'error'}.
+    """
+    if not entries:
+        return
+    db = Session()
+    query = text("""
+        INSERT INTO news_deliveries (relevant_news_id, recipient_email, status, last_error, updated_at)
+        SELECT v.news_id, v.email, v.status, v.error, :now
+        FROM unnest(CAST(:news_ids AS INT[]), CAST(:emails AS TEXT[]), CAST(:statuses AS TEXT[]), CAST(:errors AS TEXT[]))
+            AS v (news_id, email, status, error)
+        ON CONFLICT (relevant_news_id, recipient_email) DO UPDATE SET
+            status = EXCLUDED.status,
+            last_error = EXCLUDED.last_error,
+            attempts = news_deliveries.attempts + 1,
+            updated_at = EXCLUDED.updated_at
+    """)
+    try:
+        db.execute(query, {
+            "news_ids": [e['news_id'] for e in entries],
+            "emails": [e['email'] for e in entries],
+            "statuses": [e['status'] for e in entries],
+            "errors": [e.get('error') for e in entries],
+            "now": datetime.now(),
+        })
+        db.commit()
+    except Exception as e:
+        logger.error(f"Erro ao gravar entregas da newsletter: {e}")
+        db.rollback()
+    finally:
+        db.close()
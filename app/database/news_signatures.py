@@ -0,0 +1,63 @@
+from sqlalchemy import text
+
+from app.config.database import Session
+from app.config.logs import logger
+
+
+LSH_CANDIDATES_QUERY = text("""
+    SELECT l.band, l.bucket, l.news_id, s.signature, rn.duplicate_of
+    FROM raw_news_lsh l
+    JOIN unnest(CAST(:bands AS SMALLINT[]), CAST(:buckets AS BIGINT[])) AS q (band, bucket)
+        ON q.band = l.band AND q.bucket = l.bucket
+    JOIN raw_news_signatures s ON s.news_id = l.news_id
+    JOIN raw_news rn ON rn.id = l.news_id
+""")
+
+
+def find_lsh_candidates(band_buckets):
+    """
+    Busca notícias já indexadas que compartilham algum bucket LSH com os pares (band, bucket) informados.
+    Retorna lista de dicts com band, bucket, news_id, signature e duplicate_of.
+    """
+    if not band_buckets:
+        return []
+    db = Session()
+    try:
+        result = db.execute(LSH_CANDIDATES_QUERY, {
+            "bands": [band for band, _ in band_buckets],
+            "buckets": [bucket for _, bucket in band_buckets],
+        })
+        return [dict(row._mapping) for row in result]
+    except Exception as e:
+        logger.error(f"Erro ao buscar candidatos a quase duplicadas: {e}")
+        return []
+    finally:
+        db.close()
+
+
+def save_signatures(entries):
+    """
+    Grava assinaturas MinHash e buckets LSH. Recebe lista de dicts {'news_id', 'signature', 'buckets': [(band, bucket)]}.
+    """
+    if not entries:
+        return
+    db = Session()
+    try:
+        db.execute(text("""
+            INSERT INTO raw_news_signatures (news_id, signature) VALUES (:news_id, :signature)
+            ON CONFLICT (news_id) DO NOTHING
+        """), [{"news_id": e['news_id'], "signature": e['signature']} for e in entries])
+        db.execute(text("""
+            INSERT INTO raw_news_lsh (band, bucket, news_id) VALUES (:band, :bucket, :news_id)
+            ON CONFLICT DO NOTHING
+        """), [
+            {"band": band, "bucket": bucket, "news_id": e['news_id']}
+            for e in entries
+            for band, bucket in e['buckets']
+        ])
+        db.commit()
+    except Exception as e:
+        logger.error(f"Erro ao gravar assinaturas de quase duplicadas: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,141 @@
+import json
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.config.database import engine
+from app.config.logs import logger
+from app.database.llm_cache import LLM_CACHE_EXPIRED_QUERY, LLM_CACHE_LOOKUP_QUERY, LLM_CACHE_OVERFLOW_QUERY
+from app.database.news_signatures import LSH_CANDIDATES_QUERY
+from app.database.raw_news import (
+    COPY_RELEVANCE_TO_DUPLICATES_QUERY, EXISTING_URLS_QUERY, LABELED_NEWS_QUERY, RELEVANT_NEWS_QUERY,
+    UNCLASSIFIED_NEWS_QUERY,
+)
+from app.database.relevant_news import NEWS_TO_SEND_QUERY
+
+
+DEFAULT_SEED_ROWS = 300000
+
+# Tabelas grandes: um Seq Scan nelas reprova a verificação. O search_cache fica de fora
+# porque a limpeza a cada execução o mantém pequeno (poucas horas de respostas)
+LARGE_TABLES = {"raw_news", "relevant_news", "llm_cache", "raw_news_signatures", "raw_news_lsh"}
+
+SEED_STATEMENTS = [
+    # ~1% sem classificação, ~3% relevantes, o restante irrelevante; 1% sem conteúdo extraído
+    """
+    INSERT INTO raw_news (published_at, title, source, url, canonical_url, search_engine, raw_content, is_relevant, relevance_score)
+    SELECT
+        now() - g * interval '1 minute',
+        'Notícia ' || g,
+        'Fonte ' || (g % 50),
+        :prefix || g,
+        :prefix || g,
+        CASE WHEN g % 2 = 0 THEN 'google_news' ELSE 'bing_news' END,
+        CASE WHEN g % 101 = 0 THEN NULL ELSE repeat('conteúdo da notícia ', 40) END,
+        CASE WHEN g % 100 = 0 THEN NULL WHEN g % 33 = 0 THEN true ELSE false END,
+        CASE WHEN g % 100 = 0 THEN NULL WHEN g % 33 = 0 THEN 8 ELSE 2 END
+    FROM generate_series(1, :rows) AS g
+    """,
+    # ~1% de quase duplicadas apontando para a notícia anterior
+    """
+    UPDATE raw_news AS d SET duplicate_of = c.id
+    FROM raw_news AS c
+    WHERE d.url LIKE :prefix || '%' AND c.url LIKE :prefix || '%'
+        AND c.id = d.id - 1 AND d.id % 97 = 0
+    """,
+    # Quase todas as relevantes já agrupadas; poucas pendentes ou com erro de envio
+    """
+    INSERT INTO relevant_news (original_url, published_at, original_title, source, topic, headline, ai_summary, status)
+    SELECT url, published_at, title, source, 'Tema', title, 'Resumo',
+        CASE WHEN id % 50 = 0 THEN 'pending' WHEN id % 75 = 0 THEN 'error' ELSE 'sent' END
+    FROM raw_news
+    WHERE url LIKE :prefix || '%' AND is_relevant = true AND id % 20 <> 0
+    """,
+    # Cache da IA cheio, com ~3% das entradas expiradas (a limpeza roda a cada execução)
+    """
+    INSERT INTO llm_cache (cache_key, payload, created_at, last_hit_at)
+    SELECT :prefix || g, '{}', now() - (g % 31) * interval '1 day', now() - (g % 7) * interval '1 day'
+    FROM generate_series(1, :rows / 3) AS g
+    """,
+    """
+    INSERT INTO raw_news_signatures (news_id, signature)
+    SELECT id, '\\x00'::bytea FROM raw_news WHERE url LIKE :prefix || '%'
+    """,
+    """
+    INSERT INTO raw_news_lsh (band, bucket, news_id)
+    SELECT b, (id * 16 + b) % 1000003, id FROM raw_news, generate_series(0, 3) AS b
+    WHERE url LIKE :prefix || '%'
+    """,
+]
+
+
+def _query_checks(prefix):
+    """
+    Consultas de app/database verificadas, com parâmetros de exemplo: (nome, consulta, parâmetros, tabelas com Seq Scan aceito).
+    """
+    now = datetime.now()
+    urls = [f"{prefix}{i}" for i in range(1, 1000, 2)]
+    return [
+        ("iter_unclassified_news", UNCLASSIFIED_NEWS_QUERY, {"last_id": 0, "limit": 500}, set()),
+        ("get_labeled_news", LABELED_NEWS_QUERY, {"limit": 5000}, set()),
+        ("copy_relevance_to_duplicates", COPY_RELEVANCE_TO_DUPLICATES_QUERY, {}, set()),
+        ("find_existing_urls", EXISTING_URLS_QUERY, {"urls": urls}, set()),
+        # Com quase todas as relevantes já agrupadas o anti-join por hash sobre relevant_news é o plano esperado;
+        # raw_news precisa vir do índice parcial
+        ("get_relevant_news", RELEVANT_NEWS_QUERY, {}, {"relevant_news"}),
+        ("get_news_to_sent", NEWS_TO_SEND_QUERY, {}, set()),
+        ("get_cached_responses", LLM_CACHE_LOOKUP_QUERY, {"now": now, "cache_keys": urls[:50], "min_created_at": now - timedelta(days=30)}, set()),
+        ("evict_llm_cache (expiradas)", LLM_CACHE_EXPIRED_QUERY, {"min_created_at": now - timedelta(days=30)}, set()),
+        ("evict_llm_cache (excedentes)", LLM_CACHE_OVERFLOW_QUERY, {"max_entries": 100000}, set()),
+        ("find_lsh_candidates", LSH_CANDIDATES_QUERY, {"bands": list(range(16)), "buckets": list(range(16))}, set()),
+    ]
+
+
+def _seq_scans(plan):
+    """
+    Percorre o plano (EXPLAIN FORMAT JSON) e retorna as tabelas lidas com Seq Scan.
+    """
+    tables = []
+    if plan.get("Node Type") == "Seq Scan":
+        tables.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        tables.extend(_seq_scans(child))
+    return tables
+
+
+def check_query_plans(rows=DEFAULT_SEED_ROWS):
+    """
+    Popula o banco com `rows` notícias sintéticas dentro de uma transação, roda EXPLAIN nas consultas
+    de app/database e desfaz tudo ao final. Retorna a lista de falhas (consultas com Seq Scan em tabela grande).
+    Use um banco de homologação: o volume inserido é desfeito, mas ocupa espaço até o próximo VACUUM.
+    """
+    prefix = f"https://seed.invalid/{uuid.uuid4().hex}/"
+    failures = []
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            logger.info(f"Populando {rows} notícias sintéticas para a verificação dos planos...")
+            for statement in SEED_STATEMENTS:
+                conn.execute(text(statement), {"prefix": prefix, "rows": rows})
+            for table in sorted(LARGE_TABLES):
+                conn.execute(text(f"ANALYZE {table}"))
+
+            for name, query, params, allowed in _query_checks(prefix):
+                result = conn.execute(text("EXPLAIN (FORMAT JSON) " + query.text), params).scalar()
+                plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+                scans = [t for t in _seq_scans(plan) if t in LARGE_TABLES and t not in allowed]
+                if scans:
+                    failures.append((name, scans))
+                    logger.error(f"❌ {name}: Seq Scan em {', '.join(scans)}")
+                else:
+                    logger.info(f"✅ {name}: sem Seq Scan em tabelas grandes")
+        finally:
+            transaction.rollback()
+    return failures
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SEED_ROWS
+    sys.exit(1 if check_query_plans(rows) else 0)
@@ -1,18 +1,35 @@
+from itertools import islice
+
 from sqlalchemy import text
 
-from app.config.database import Session
+from app.config.database import Session, streaming_session
+from app.config.environments import env
 from app.config.logs import logger
+from app.services.url_canonicalizer import canonicalize_url
+
+
+RAW_NEWS_COLUMNS = ("published_at", "title", "source", "url", "canonical_url", "search_engine", "raw_content")
+
+
+def _chunked(items, size):
+	iterator = iter(items)
+	while True:
+		chunk = list(islice(iterator, size))
+		if not chunk:
+			return
+		yield chunk
 
 
 def insert_raw_news(news_item):
 	db = Session()
+	# Sem alvo no ON CONFLICT: ignora duplicidade tanto de url quanto de canonical_url
 	query = text("""
-		INSERT INTO raw_news (published_at, title, source, url, search_engine, raw_content)
-		VALUES (:published_at, :title, :source, :url, :search_engine, :raw_content)
-		ON CONFLICT (url) DO NOTHING
+		INSERT INTO raw_news (published_at, title, source, url, canonical_url, search_engine, raw_content)
+		VALUES (:published_at, :title, :source, :url, :canonical_url, :search_engine, :raw_content)
+		ON CONFLICT DO NOTHING
 	""")
 	try:
-		result = db.execute(query, news_item)
+		result = db.execute(query, {**news_item, 'canonical_url': news_item.get('canonical_url') or canonicalize_url(news_item.get('url'))})
 		db.commit()
 		if result.rowcount > 0:
 			logger.info(f"Notícia inserida: {news_item['title']} ({news_item['url']})")
@@ -28,18 +45,176 @@ def insert_raw_news(news_item):
 		db.close()
 
 
-def get_unclassified_news():
-	db = Session()
-	query = text("""
-		SELECT id, raw_content, url FROM raw_news WHERE is_relevant IS NULL AND raw_content IS NOT NULL
+def _insert_raw_news_chunk(db, chunk):
+	# Remove URLs (canônicas) repetidas dentro do próprio bloco antes de montar o INSERT multi-linha
+	unique = {}
+	for item in chunk:
+		if not item.get('url'):
+			continue
+		canonical_url = item.get('canonical_url') or canonicalize_url(item['url'])
+		if canonical_url not in unique:
+			unique[canonical_url] = {**item, 'canonical_url': canonical_url}
+	items = list(unique.values())
+	if not items:
+		return {}
+	values = []
+	params = {}
+	for i, item in enumerate(items):
+		values.append("(" + ", ".join(f":{column}_{i}" for column in RAW_NEWS_COLUMNS) + ")")
+		for column in RAW_NEWS_COLUMNS:
+			params[f"{column}_{i}"] = item.get(column)
+	query = text(f"""
+		INSERT INTO raw_news ({", ".join(RAW_NEWS_COLUMNS)})
+		VALUES {", ".join(values)}
+		ON CONFLICT DO NOTHING
+		RETURNING id, url
 	""")
+	result = db.execute(query, params)
+	return {row[1]: row[0] for row in result}
+
+
+def _insert_raw_news_rows(db, chunk):
+	"""
+	Insere o bloco item a item, cada um no seu SAVEPOINT, para que só os itens inválidos falhem.
+	Retorna (URL -> id das inseridas, URLs com erro).
+	"""
+	inserted_ids = {}
+	failed = set()
 	try:
-		result = db.execute(query)
-		news = [dict(row._mapping) for row in result]
-		logger.info(f"{len(news)} notícias não classificadas encontradas.")
-		return news
+		for item in chunk:
+			try:
+				with db.begin_nested():
+					inserted_ids.update(_insert_raw_news_chunk(db, [item]))
+			except Exception as e:
+				logger.error(f"Erro ao inserir notícia: {e} | URL: {item.get('url')}")
+				failed.add(item.get('url'))
+		db.commit()
 	except Exception as e:
-		logger.error(f"Erro ao buscar notícias não classificadas: {e}")
+		logger.error(f"Erro ao gravar notícias inseridas item a item: {e}")
+		db.rollback()
+		return {}, {item.get('url') for item in chunk}
+	return inserted_ids, failed
+
+
+def insert_raw_news_bulk(news_items, chunk_size=None):
+	"""
+	Insere notícias em lote usando INSERT multi-linha com ON CONFLICT DO NOTHING RETURNING.
+	Duplicidade é verificada tanto pela url quanto pela canonical_url.
+	Aceita lista ou iterador e grava em blocos de `chunk_size` itens, com um commit por bloco.
+	Retorna lista com o relatório de cada bloco: {'inserted': [...], 'duplicated': [...], 'failed': [...]} (URLs)
+	e 'ids' (URL -> id das notícias inseridas).
+	"""
+	chunk_size = chunk_size or env.DB_BULK_CHUNK_SIZE
+	reports = []
+	db = Session()
+	try:
+		for number, chunk in enumerate(_chunked(news_items, chunk_size), 1):
+			urls = [item.get('url') for item in chunk]
+			failed = set()
+			try:
+				inserted_ids = _insert_raw_news_chunk(db, chunk)
+				db.commit()
+			except Exception as e:
+				logger.error(f"Erro ao inserir bloco {number} de notícias ({len(chunk)} itens), inserindo item a item: {e}")
+				db.rollback()
+				inserted_ids, failed = _insert_raw_news_rows(db, chunk)
+			report = {'inserted': [], 'duplicated': [], 'failed': [], 'ids': dict(inserted_ids)}
+			for url in urls:
+				if url in failed:
+					report['failed'].append(url)
+				elif inserted_ids.pop(url, None) is not None:
+					report['inserted'].append(url)
+				else:
+					report['duplicated'].append(url)
+			logger.info(
+				f"Bloco {number}: {len(report['inserted'])} inseridas, "
+				f"{len(report['duplicated'])} duplicadas, {len(report['failed'])} com erro."
+			)
+			reports.append(report)
+		return reports
+	finally:
+		db.close()
+
+
+def _stream(db, query, params=None, batch_size=None):
+	"""
+	Executa a consulta com cursor no servidor e gera lotes de até `batch_size` linhas (dicts).
+	"""
+	batch_size = batch_size or env.DB_STREAM_BATCH_SIZE
+	result = db.execute(query, params or {}, execution_options={"stream_results": True, "yield_per": batch_size})
+	for partition in result.partitions():
+		yield [dict(row._mapping) for row in partition]
+
+
+UNCLASSIFIED_NEWS_QUERY = text("""
+	SELECT id, raw_content, url, duplicate_of FROM raw_news
+	WHERE is_relevant IS NULL AND raw_content IS NOT NULL AND id > :last_id
+	ORDER BY id
+	LIMIT :limit
+""")
+
+
+def iter_unclassified_news(batch_size=None):
+	"""
+	Gera em lotes as notícias ainda não classificadas, paginadas por id (keyset).
+	Cada lote é lido em uma transação curta, encerrada antes de o lote ser entregue: a classificação
+	(que pode levar minutos) não mantém cursor nem transação abertos no banco.
+	"""
+	batch_size = batch_size or env.DB_STREAM_BATCH_SIZE
+	total = 0
+	last_id = 0
+	while True:
+		db = Session()
+		try:
+			result = db.execute(UNCLASSIFIED_NEWS_QUERY, {"last_id": last_id, "limit": batch_size})
+			batch = [dict(row._mapping) for row in result]
+		except Exception as e:
+			logger.error(f"Erro ao buscar notícias não classificadas: {e}")
+			break
+		finally:
+			db.close()
+		if not batch:
+			break
+		total += len(batch)
+		last_id = batch[-1]['id']
+		yield batch
+	logger.info(f"{total} notícias não classificadas encontradas.")
+
+
+def _normalize_relevance(relevance):
+	"""
+	Converte a nota do modelo para inteiro de 0 a 10 (ex.: "8.5" -> 8); valores inválidos viram None.
+	Mesma regra de _parse_batch_response, para que uma nota malformada não derrube o bloco inteiro.
+	"""
+	try:
+		relevance = float(relevance)
+	except (TypeError, ValueError):
+		return None
+	return round(relevance) if 0 <= relevance <= 10 else None
+
+
+def _is_relevant(relevance):
+	return relevance is not None and relevance >= 7
+
+
+LABELED_NEWS_QUERY = text("""
+	SELECT raw_content, relevance_score FROM raw_news
+	WHERE relevance_score IS NOT NULL AND raw_content IS NOT NULL
+	ORDER BY id DESC
+	LIMIT :limit
+""")
+
+
+def get_labeled_news(limit):
+	"""
+	Busca as notícias mais recentes já avaliadas pela IA (com nota), usadas para treinar o pré-filtro local.
+	"""
+	db = Session()
+	try:
+		result = db.execute(LABELED_NEWS_QUERY, {"limit": limit})
+		return [dict(row._mapping) for row in result]
+	except Exception as e:
+		logger.error(f"Erro ao buscar notícias rotuladas: {e}")
 		return []
 	finally:
 		db.close()
@@ -47,7 +222,7 @@ def get_unclassified_news():
 
 def update_news_relevance(news_id, relevance, context):
 	db = Session()
-	is_relevant = relevance is not None and relevance >= 7
+	is_relevant = _is_relevant(relevance)
 	query = text("""
 		UPDATE raw_news SET is_relevant = :is_relevant, relevance_score = :relevance, context = :context WHERE id = :news_id
 	""")
@@ -62,36 +237,151 @@ def update_news_relevance(news_id, relevance, context):
 		db.close()
 
 
-def get_existing_urls():
-    db = Session()
-    query = text("SELECT url FROM raw_news")
-    try:
-        result = db.execute(query)
-        return set(row[0] for row in result)
-    finally:
-        db.close()
-		
+def update_news_relevance_bulk(results, chunk_size=None):
+	"""
+	Atualiza relevância e contexto de várias notícias com UPDATE ... FROM (VALUES ...).
+	Recebe lista ou iterador de dicts {'id', 'relevance', 'context'} e grava em blocos, com um commit por bloco.
+	Retorna o total de notícias atualizadas.
+	"""
+	chunk_size = chunk_size or env.DB_BULK_CHUNK_SIZE
+	updated = 0
+	db = Session()
+	try:
+		for chunk in _chunked(results, chunk_size):
+			values = []
+			params = {}
+			for i, r in enumerate(chunk):
+				relevance = _normalize_relevance(r['relevance'])
+				values.append(
+					f"(CAST(:id_{i} AS INT), CAST(:relevance_{i} AS INT), "
+					f"CAST(:is_relevant_{i} AS BOOLEAN), CAST(:context_{i} AS TEXT))"
+				)
+				params[f"id_{i}"] = r['id']
+				params[f"relevance_{i}"] = relevance
+				params[f"is_relevant_{i}"] = _is_relevant(relevance)
+				params[f"context_{i}"] = r['context']
+			query = text(f"""
+				UPDATE raw_news AS rn
+				SET relevance_score = v.relevance, is_relevant = v.is_relevant, context = v.context
+				FROM (VALUES {", ".join(values)}) AS v (id, relevance, is_relevant, context)
+				WHERE rn.id = v.id
+			""")
+			try:
+				result = db.execute(query, params)
+				db.commit()
+				updated += result.rowcount
+				logger.info(f"Relevância atualizada para {result.rowcount} notícias (ids {chunk[0]['id']}..{chunk[-1]['id']}).")
+			except Exception as e:
+				logger.error(f"Erro ao atualizar relevância em lote ({len(chunk)} notícias): {e}")
+				db.rollback()
+		return updated
+	finally:
+		db.close()
 
-def get_relevant_news():
+
+def mark_duplicates(duplicates):
+	"""
+	Vincula notícias quase duplicadas ao seu representante canônico. Recebe dict news_id -> canonical_id.
+	"""
+	if not duplicates:
+		return
 	db = Session()
 	query = text("""
-		SELECT * FROM raw_news rn
-		WHERE is_relevant = true
-		AND NOT EXISTS (
-			SELECT 1 FROM relevant_news r
-			WHERE r.original_url = rn.url
-		)
+		UPDATE raw_news AS rn SET duplicate_of = v.canonical_id
+		FROM unnest(CAST(:news_ids AS INT[]), CAST(:canonical_ids AS INT[])) AS v (news_id, canonical_id)
+		WHERE rn.id = v.news_id
 	""")
 	try:
-		result = db.execute(query)
-		news = [dict(row._mapping) for row in result]
+		db.execute(query, {"news_ids": list(duplicates.keys()), "canonical_ids": list(duplicates.values())})
+		db.commit()
+		logger.info(f"{len(duplicates)} notícias vinculadas ao seu representante canônico.")
+	except Exception as e:
+		logger.error(f"Erro ao vincular notícias quase duplicadas: {e}")
+		db.rollback()
+	finally:
+		db.close()
+
+
+COPY_RELEVANCE_TO_DUPLICATES_QUERY = text("""
+	UPDATE raw_news AS d
+	SET is_relevant = c.is_relevant, relevance_score = c.relevance_score, context = c.context
+	FROM raw_news AS c
+	WHERE d.duplicate_of = c.id AND d.is_relevant IS NULL AND c.is_relevant IS NOT NULL
+""")
+
+
+def copy_relevance_to_duplicates():
+	"""
+	Copia relevância, nota e contexto dos representantes já classificados para suas quase duplicadas.
+	Retorna o total de notícias atualizadas.
+	"""
+	db = Session()
+	try:
+		result = db.execute(COPY_RELEVANCE_TO_DUPLICATES_QUERY)
+		db.commit()
+		logger.info(f"Classificação copiada para {result.rowcount} notícias quase duplicadas.")
+		return result.rowcount
+	except Exception as e:
+		logger.error(f"Erro ao copiar classificação para quase duplicadas: {e}")
+		db.rollback()
+		return 0
+	finally:
+		db.close()
+
+
+EXISTING_URLS_QUERY = text("SELECT url, canonical_url FROM raw_news WHERE url = ANY(:urls) OR canonical_url = ANY(:urls)")
+
+
+def find_existing_urls(urls, chunk_size=None):
+	"""
+	Verifica quais das URLs candidatas (originais ou canônicas) já existem em raw_news como url ou canonical_url,
+	com consultas `= ANY(...)` em blocos.
+	O consumo de memória depende só da quantidade de candidatas, não do tamanho da tabela.
+	Retorna o conjunto das URLs já gravadas.
+	"""
+	chunk_size = chunk_size or env.DB_BULK_CHUNK_SIZE
+	urls = list({url for url in urls if url})
+	existing = set()
+	if not urls:
+		return existing
+	db = Session()
+	try:
+		for i in range(0, len(urls), chunk_size):
+			result = db.execute(EXISTING_URLS_QUERY, {"urls": urls[i:i + chunk_size]})
+			for url, canonical_url in result:
+				existing.add(url)
+				if canonical_url:
+					existing.add(canonical_url)
+		return existing
+	finally:
+		db.close()
+
+
+RELEVANT_NEWS_QUERY = text("""
+	SELECT * FROM raw_news rn
+	WHERE is_relevant = true
+	AND duplicate_of IS NULL
+	AND NOT EXISTS (
+		SELECT 1 FROM relevant_news r
+		WHERE r.original_url = rn.url
+	)
+""")
+
+
+def get_relevant_news():
+	"""
+	Busca as notícias relevantes ainda não agrupadas, lidas em lotes com cursor no servidor.
+	"""
+	try:
+		news = []
+		with streaming_session() as db:
+			for batch in _stream(db, RELEVANT_NEWS_QUERY):
+				news.extend(batch)
 		logger.info(f"{len(news)} notícias relevantes não agrupadas encontradas.")
 		return news
 	except Exception as e:
 		logger.error(f"Erro ao buscar notícias relevantes não agrupadas: {e}")
 		return []
-	finally:
-		db.close()
 
 
 def delete_news(id):
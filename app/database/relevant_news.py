@@ -44,15 +44,18 @@ def insert_relevant_news(news_group):
         db.close()
 
 
+# IN (em vez de OR) para casar com o predicado do índice parcial idx_relevant_news_to_send
+NEWS_TO_SEND_QUERY = text("""
+    SELECT * FROM relevant_news
+    WHERE status IN ('pending', 'error')
+    ORDER BY published_at DESC
+""")
+
+
 def get_news_to_sent():
 	db = Session()
-	query = text("""
-        SELECT * FROM relevant_news
-        WHERE status = 'pending' OR status = 'error'
-        ORDER BY published_at DESC
-	""")
 	try:
-		result = db.execute(query)
+		result = db.execute(NEWS_TO_SEND_QUERY)
 		news = [dict(row._mapping) for row in result]
 		logger.info(f"{len(news)} notícias para envio encontradas.")
 		return news
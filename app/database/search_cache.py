@@ -0,0 +1,65 @@
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.config.database import Session
+from app.config.environments import env
+from app.config.logs import logger
+
+
+SEARCH_CACHE_LOOKUP_QUERY = text("SELECT response FROM search_cache WHERE cache_key = :cache_key AND created_at >= :min_created_at")
+
+
+def get_cached_search(cache_key):
+    """
+    Busca a resposta em cache de uma busca, se ainda estiver dentro do TTL.
+    """
+    db = Session()
+    min_created_at = datetime.now() - timedelta(hours=env.SEARCH_CACHE_TTL_HOURS)
+    try:
+        row = db.execute(SEARCH_CACHE_LOOKUP_QUERY, {"cache_key": cache_key, "min_created_at": min_created_at}).fetchone()
+        return json.loads(row[0]) if row else None
+    except Exception as e:
+        logger.error(f"Erro ao buscar resposta no cache de buscas: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def save_cached_search(cache_key, engine, response):
+    db = Session()
+    query = text("""
+        INSERT INTO search_cache (cache_key, engine, response, created_at)
+        VALUES (:cache_key, :engine, :response, :now)
+        ON CONFLICT (cache_key) DO UPDATE SET response = EXCLUDED.response, created_at = EXCLUDED.created_at
+    """)
+    try:
+        db.execute(query, {"cache_key": cache_key, "engine": engine, "response": json.dumps(response, ensure_ascii=False, default=str), "now": datetime.now()})
+        db.commit()
+    except Exception as e:
+        logger.error(f"Erro ao gravar resposta no cache de buscas: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+SEARCH_CACHE_EXPIRED_QUERY = text("DELETE FROM search_cache WHERE created_at < :min_created_at")
+
+
+def evict_search_cache():
+    """
+    Remove respostas vencidas do cache de buscas.
+    """
+    db = Session()
+    min_created_at = datetime.now() - timedelta(hours=env.SEARCH_CACHE_TTL_HOURS)
+    try:
+        result = db.execute(SEARCH_CACHE_EXPIRED_QUERY, {"min_created_at": min_created_at})
+        db.commit()
+        if result.rowcount:
+            logger.info(f"Cache de buscas: {result.rowcount} respostas vencidas removidas.")
+    except Exception as e:
+        logger.error(f"Erro ao limpar o cache de buscas: {e}")
+        db.rollback()
+    finally:
+        db.close()
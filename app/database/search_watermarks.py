@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.config.database import Session
+from app.config.logs import logger
+
+
+def get_watermarks(terms):
+    """
+    Busca as marcas d'água dos termos informados.
+    Retorna dict {(term, engine): {'newest_published_at', 'boundary_urls'}}.
+    """
+    if not terms:
+        return {}
+    db = Session()
+    query = text("""
+        SELECT term, engine, newest_published_at, boundary_urls
+        FROM search_watermarks
+        WHERE term = ANY(:terms)
+    """)
+    try:
+        result = db.execute(query, {"terms": list(terms)})
+        return {
+            (row.term, row.engine): {'newest_published_at': row.newest_published_at, 'boundary_urls': list(row.boundary_urls or [])}
+            for row in result
+        }
+    except Exception as e:
+        logger.error(f"Erro ao buscar marcas d'água da busca: {e}")
+        return {}
+    finally:
+        db.close()
+
+
+def save_watermarks(entries):
+    """
+    Grava as marcas d'água. Recebe lista de dicts {'term', 'engine', 'newest_published_at', 'boundary_urls'}.
+    """
+    if not entries:
+        return
+    db = Session()
+    query = text("""
+        INSERT INTO search_watermarks (term, engine, newest_published_at, boundary_urls, updated_at)
+        VALUES (:term, :engine, :newest_published_at, :boundary_urls, :now)
+        ON CONFLICT (term, engine) DO UPDATE SET
+            newest_published_at = EXCLUDED.newest_published_at,
+            boundary_urls = EXCLUDED.boundary_urls,
+            updated_at = EXCLUDED.updated_at
+    """)
+    now = datetime.now()
+    try:
+        db.execute(query, [{**e, "now": now} for e in entries])
+        db.commit()
+    except Exception as e:
+        logger.error(f"Erro ao gravar marcas d'água da busca: {e}")
+        db.rollback()
+    finally:
+        db.close()
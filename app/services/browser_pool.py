@@ -0,0 +1,122 @@
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+
+from app.config.environments import env
+from app.config.logs import logger
+
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Fontes não ajudam na extração de texto e custam banda/tempo de carregamento
+BLOCKED_URL_PATTERNS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
+
+
+class _PooledBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class BrowserPool:
+    """
+    Pool de navegadores Chrome headless reutilizáveis para o fallback do Selenium.
+    Mantém no máximo `size` navegadores abertos, criados sob demanda, e recicla cada um
+    após `max_pages` páginas ou em caso de falha.
+    """
+
+    def __init__(self, size, max_pages, page_load_timeout):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.page_load_timeout = page_load_timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+
+    def _create(self):
+        # Importado só quando o primeiro navegador é criado (startup dos agendamentos sem Selenium)
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_argument(f'--user-agent={USER_AGENT}')
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        driver = webdriver.Chrome(options=chrome_options)
+        driver.set_page_load_timeout(self.page_load_timeout)
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            logger.warning(f"Não foi possível bloquear fontes no Chrome: {e}")
+        logger.info("Novo navegador Chrome iniciado para o pool.")
+        return _PooledBrowser(driver)
+
+    def _discard(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Erro ao encerrar navegador do pool: {e}")
+
+    def _release(self, pooled):
+        pooled.pages += 1
+        if pooled.pages >= self.max_pages:
+            self._discard(pooled)
+            return
+        try:
+            # Interrompe scripts da página anterior e valida que o navegador segue vivo
+            pooled.driver.get("about:blank")
+        except Exception:
+            self._discard(pooled)
+            return
+        self._idle.put(pooled)
+
+    @contextmanager
+    def browser(self):
+        """
+        Empresta um navegador do pool e devolve ao final do bloco.
+        Se o bloco levantar exceção o navegador é descartado e substituído no próximo uso.
+        """
+        self._slots.acquire()
+        pooled = None
+        try:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._create()
+            yield pooled.driver
+        except Exception:
+            if pooled is not None:
+                self._discard(pooled)
+                pooled = None
+            raise
+        finally:
+            if pooled is not None:
+                self._release(pooled)
+            self._slots.release()
+
+    def close_all(self):
+        """
+        Encerra os navegadores ociosos. O pool continua utilizável e abre novos navegadores sob demanda.
+        """
+        with self._lock:
+            while True:
+                try:
+                    pooled = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self._discard(pooled)
+
+
+browser_pool = BrowserPool(
+    size=env.BROWSER_POOL_SIZE,
+    max_pages=env.BROWSER_MAX_PAGES,
+    page_load_timeout=env.EXTRACTION_TIMEOUT,
+)
+atexit.register(browser_pool.close_all)
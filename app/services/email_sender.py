@@ -1,27 +1,70 @@
-import smtplib
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-
-import pandas as pd
+from email.utils import formataddr
 
 from app.config.environments import env
 from app.config.logs import logger
+from app.database.news_deliveries import get_delivered_news, record_deliveries
 from app.database.relevant_news import get_news_to_sent, update_news_status_and_sent_at
 from app.database.recipients import get_recipient_emails
+from app.services.mail_delivery import deliver_messages
+from app.services.newsletter_renderer import newsletter_renderer
+
+
+SENDER_NAME = 'Newsletter de PPPs e Concessões'
+
+
+def _build_messages(news, recipient_emails, delivered, sender):
+    """
+    Monta uma mensagem por destinatário só com as notícias que ele ainda não recebeu.
+    Destinatários com o mesmo conjunto pendente compartilham o corpo renderizado (HTML e texto puro).
+    Retorna lista de tuplas (destinatário, mensagem serializada, ids das notícias).
+    """
+    pending = {}
+    for email in recipient_emails:
+        ids = tuple(n['id'] for n in news if n['id'] not in delivered.get(email, set()))
+        if ids:
+            pending.setdefault(ids, []).append(email)
+
+    by_id = {n['id']: n for n in news}
+    subject = f'Resumo das Notícias - {datetime.today().strftime("%d/%m/%Y")}'
+    messages = []
+    for ids, emails in pending.items():
+        html, text = newsletter_renderer.render([by_id[i] for i in ids])
+        plain_part, html_part = MIMEText(text, "plain"), MIMEText(html, "html")
+        for email in emails:
+            msg = MIMEMultipart("alternative")
+            msg['Subject'] = subject
+            msg['From'] = formataddr((SENDER_NAME, sender))
+            msg['To'] = email
+            msg.attach(plain_part)
+            msg.attach(html_part)
+            messages.append((email, msg.as_string(), ids))
+    return messages
+
+
+def _delivery_status(failure):
+    if not failure:
+        return 'sent'
+    return 'bounced' if failure.permanent else 'error'
 
 
 def send_newsletter_email():
+    """
+    Envia a newsletter com as notícias pendentes: uma mensagem por destinatário, entregue em paralelo
+    pelo pool de conexões SMTP. A entrega é registrada por notícia e destinatário (news_deliveries),
+    de forma que só quem teve falha temporária recebe de novo na próxima execução; recusas definitivas
+    do destinatário (5xx no RCPT) ficam como 'bounced' e não são repetidas. Falhas de conexão, autenticação
+    ou do remetente não são recusas do destinatário e contam como temporárias. Notícias sem falhas
+    temporárias ficam como 'sent'; as demais, como 'error'.
+    """
     news = None
     try:
-        sender_email = 'Newsletter de PPPs e Concessões'
-        smtp_server = 'smtp.gmail.com'
-        smtp_port = 587
-        smtp_user = env.MAIL_USER
-        smtp_password = env.MAIL_PASSWORD
-
-        if not smtp_user or not smtp_password:
+        if env.MAIL_SMTP_AUTH and (not env.MAIL_USER or not env.MAIL_PASSWORD):
             raise Exception("Variáveis de ambiente MAIL_USER e MAIL_PASSWORD não encontradas.")
+        if not env.MAIL_FROM:
+            raise Exception("Variável de ambiente MAIL_FROM (ou MAIL_USER) não encontrada.")
 
         news = get_news_to_sent()
         if not news:
@@ -33,50 +76,23 @@ def send_newsletter_email():
             logger.info("Nenhum destinatário encontrado para envio de e-mail (lista vazia ou None).")
             return
 
-        html = "<h2>Resumo das Notícias</h2>"
-        temas = {}
-        for n in news:
-            tema = n.get('topic', 'Sem tema')
-            if tema not in temas:
-                temas[tema] = []
-            temas[tema].append(n)
-        for tema, grupo in temas.items():
-            headline = grupo[0].get('headline', f"Tema {tema}")
-            resumo = grupo[0].get('ai_summary', '')
-            html += f'<h3>{headline}</h3>'
-            html += f'<p><b>Resumo:</b> {resumo}</p>'
-            html += '<ul>'
-            for n in grupo:
-                dt = n.get('published_at', '')
-                if dt:
-                    try:
-                        dt = pd.to_datetime(dt).strftime('%d/%m/%Y')
-                    except Exception:
-                        pass
-                fonte = n.get('source', '')
-                html += (
-                    f"<li style='font-size: 14px; font-weight: normal; color: #555;'>"
-                    f"<a href=\"{n.get('original_url','')}\" style='color: #1a73e8; text-decoration: none; font-size: 14px;'>{n.get('original_title','')}</a> "
-                    f"(Fonte: <span style='font-size: 12px; color: #777;'>{fonte} - {dt}</span>)"
-                    f"</li>"
-                )
-            html += '</ul><br>'
-        msg = MIMEMultipart("alternative")
-        msg['Subject'] = f'Resumo das Notícias - {datetime.today().strftime("%d/%m/%Y")}'
-        msg['From'] = sender_email
-        msg['To'] = ','.join(recipient_emails)
-        part = MIMEText(html, "html")
-        msg.attach(part)
-        logger.info("Conectando ao servidor SMTP...")
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.sendmail(sender_email, recipient_emails, msg.as_string())
-        server.quit()
-        logger.info("E-mail enviado com sucesso!")
-        if news:
-            news_ids = [n['id'] for n in news]
-            update_news_status_and_sent_at(news_ids, 'sent')
+        news_ids = [n['id'] for n in news]
+        messages = _build_messages(news, recipient_emails, get_delivered_news(news_ids), env.MAIL_FROM)
+        logger.info(f"Enviando {len(messages)} e-mails ({len(recipient_emails)} destinatários ativos)...")
+        results = deliver_messages([(email, message) for email, message, _ in messages], env.MAIL_FROM)
+
+        record_deliveries([
+            {'news_id': news_id, 'email': email, 'status': _delivery_status(results[email]), 'error': results[email].error if results[email] else None}
+            for email, _, ids in messages
+            for news_id in ids
+        ])
+        failed_ids = {news_id for email, _, ids in messages if results[email] and not results[email].permanent for news_id in ids}
+        sent_ids = [news_id for news_id in news_ids if news_id not in failed_ids]
+        if sent_ids:
+            update_news_status_and_sent_at(sent_ids, 'sent')
+        if failed_ids:
+            update_news_status_and_sent_at(sorted(failed_ids), 'error')
+        logger.info(f"E-mails enviados: {len(messages) - sum(1 for error in results.values() if error)} de {len(messages)}.")
     except Exception as e:
         logger.error(f"Erro ao enviar e-mail: {e}")
         if news:
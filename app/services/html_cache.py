@@ -0,0 +1,159 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import zstandard
+
+from app.config.environments import env
+from app.config.logs import logger
+from app.services.url_canonicalizer import canonicalize_url
+
+
+class HtmlCache:
+    """
+    Cache em disco do HTML baixado, endereçado por conteúdo e comprimido com zstd.
+    O índice (SQLite) guarda por URL canônica e variante ('http' ou 'selenium') o hash do conteúdo,
+    ETag e Last-Modified para GET condicional. Entradas mais novas que `fresh_seconds` são usadas
+    sem consultar o site; a limpeza remove entradas acima de `max_age_seconds` e, acima de
+    `max_bytes`, as menos acessadas recentemente.
+    """
+
+    def __init__(self, directory, fresh_seconds, max_age_seconds, max_bytes):
+        self.directory = directory
+        self.fresh_seconds = fresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _db(self):
+        if self._connection is None:
+            os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+            self._connection = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), check_same_thread=False)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    url_key TEXT NOT NULL,
+                    variant TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (url_key, variant)
+                )
+            """)
+            self._connection.commit()
+        return self._connection
+
+    def _object_path(self, content_hash):
+        return os.path.join(self.directory, "objects", content_hash[:2], f"{content_hash}.zst")
+
+    def get(self, url, variant="http"):
+        """
+        Retorna a entrada em cache ({'html', 'etag', 'last_modified', 'fresh'}) ou None.
+        """
+        url_key = canonicalize_url(url)
+        with self._lock:
+            row = self._db().execute(
+                "SELECT content_hash, etag, last_modified, fetched_at FROM entries WHERE url_key = ? AND variant = ?",
+                (url_key, variant),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db().execute(
+                "UPDATE entries SET last_access = ? WHERE url_key = ? AND variant = ?", (time.time(), url_key, variant)
+            )
+            self._db().commit()
+        content_hash, etag, last_modified, fetched_at = row
+        try:
+            with open(self._object_path(content_hash), "rb") as f:
+                html = zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+        except (OSError, zstandard.ZstdError) as e:
+            logger.warning(f"Entrada do cache de HTML ilegível, ignorando: {e} | URL: {url}")
+            return None
+        return {
+            'html': html,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': time.time() - fetched_at < self.fresh_seconds,
+        }
+
+    def put(self, url, html, variant="http", etag=None, last_modified=None):
+        data = html.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._object_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zstandard.ZstdCompressor(level=env.HTML_CACHE_ZSTD_LEVEL).compress(data)
+            temporary = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(compressed)
+            os.replace(temporary, path)
+        now = time.time()
+        with self._lock:
+            self._db().execute("""
+                INSERT OR REPLACE INTO entries (url_key, variant, url, content_hash, size, etag, last_modified, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (canonicalize_url(url), variant, url, content_hash, os.path.getsize(path), etag, last_modified, now, now))
+            self._db().commit()
+
+    def touch(self, url, variant="http"):
+        """
+        Renova a validade de uma entrada confirmada pelo site (resposta 304).
+        """
+        now = time.time()
+        with self._lock:
+            self._db().execute(
+                "UPDATE entries SET fetched_at = ?, last_access = ? WHERE url_key = ? AND variant = ?",
+                (now, now, canonicalize_url(url), variant),
+            )
+            self._db().commit()
+
+    def iter_urls(self, variant=None):
+        """
+        Lista as URLs com HTML em cache, para reprocessar extrações offline.
+        """
+        with self._lock:
+            query = "SELECT DISTINCT url FROM entries" + (" WHERE variant = ?" if variant else "")
+            rows = self._db().execute(query, (variant,) if variant else ()).fetchall()
+        return [row[0] for row in rows]
+
+    def evict(self):
+        """
+        Remove entradas vencidas e, acima do tamanho máximo, as menos acessadas; apaga objetos órfãos.
+        """
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM entries WHERE fetched_at < ?", (time.time() - self.max_age_seconds,))
+            # Objetos compartilhados entre URLs contam uma vez no tamanho total
+            rows = db.execute("""
+                SELECT content_hash, size, MAX(last_access) FROM entries GROUP BY content_hash ORDER BY MAX(last_access) DESC
+            """).fetchall()
+            total = 0
+            for content_hash, size, _ in rows:
+                total += size
+                if total > self.max_bytes:
+                    db.execute("DELETE FROM entries WHERE content_hash = ?", (content_hash,))
+            db.commit()
+            referenced = {row[0] for row in db.execute("SELECT DISTINCT content_hash FROM entries")}
+        removed = 0
+        objects_dir = os.path.join(self.directory, "objects")
+        for root, _, files in os.walk(objects_dir):
+            for name in files:
+                if name.endswith(".zst") and name[:-4] not in referenced:
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+        if removed:
+            logger.info(f"Cache de HTML: {removed} páginas removidas na limpeza.")
+
+
+html_cache = HtmlCache(
+    directory=env.HTML_CACHE_DIR,
+    fresh_seconds=env.HTML_CACHE_FRESH_HOURS * 3600,
+    max_age_seconds=env.HTML_CACHE_MAX_AGE_DAYS * 86400,
+    max_bytes=env.HTML_CACHE_MAX_MB * 1024 * 1024,
+)
@@ -0,0 +1,42 @@
+import hashlib
+import re
+
+from app.config.environments import env
+from app.config.logs import logger
+from app.config.metrics import metrics
+from app.database.llm_cache import get_cached_responses, save_cached_responses
+
+
+def normalize_content(content):
+    """
+    Normaliza o conteúdo para que cópias da mesma notícia gerem a mesma chave (espaços e caixa).
+    """
+    return re.sub(r"\s+", " ", content or "").strip().casefold()
+
+
+def make_cache_key(model, template_version, *parts):
+    """
+    Gera a chave do cache: sha256 de modelo, versão do template do prompt e partes normalizadas.
+    """
+    raw = "\x1f".join([model, template_version] + [normalize_content(part) for part in parts])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(cache_keys, label):
+    """
+    Consulta o cache e loga a taxa de acerto. Retorna dict cache_key -> payload.
+    """
+    if not env.LLM_CACHE_ENABLED:
+        return {}
+    unique_keys = set(cache_keys)
+    cached = get_cached_responses(unique_keys)
+    if unique_keys:
+        logger.info(f"Cache da IA ({label}): {len(cached)}/{len(unique_keys)} respostas reaproveitadas.")
+        metrics.inc("llm_cache_lookups", len(cached), "Consultas ao cache da IA por uso e resultado", label=label, result="hit")
+        metrics.inc("llm_cache_lookups", len(unique_keys) - len(cached), label=label, result="miss")
+    return cached
+
+
+def store(entries):
+    if env.LLM_CACHE_ENABLED:
+        save_cached_responses(entries)
@@ -0,0 +1,144 @@
+import asyncio
+import random
+import time
+from functools import lru_cache
+
+from app.config.environments import env
+from app.config.logs import logger
+from app.config.metrics import metrics
+
+
+@lru_cache(maxsize=1)
+def retryable_errors():
+    """
+    Erros temporários da OpenAI que geram nova tentativa. O SDK só é importado na primeira chamada à IA.
+    """
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+    return (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+def estimate_request_tokens(request):
+    """
+    Estima os tokens consumidos por uma requisição (prompt + limite de resposta) para o limitador de TPM.
+    """
+    prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+    return prompt_chars // 4 + 1 + request.get("max_completion_tokens", 0)
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket para uso dentro de um único event loop.
+    Reabastece `per_minute` unidades por minuto; com `per_minute` <= 0 não aplica limite.
+    """
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.capacity = max(1, per_minute)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    async def acquire(self, amount=1):
+        if self.per_minute <= 0:
+            return
+        amount = min(amount, self.capacity)
+        rate = self.per_minute / 60
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return
+            await asyncio.sleep((amount - self._tokens) / rate)
+
+
+def _retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def _record_usage(model, response, seconds):
+    metrics.observe("llm_request_seconds", seconds, "Latência das chamadas à OpenAI", model=model)
+    metrics.inc("llm_requests", description="Chamadas à OpenAI concluídas", model=model)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        metrics.inc("llm_tokens", usage.prompt_tokens or 0, "Tokens consumidos na OpenAI", model=model, kind="prompt")
+        metrics.inc("llm_tokens", usage.completion_tokens or 0, model=model, kind="completion")
+
+
+class LLMExecutor:
+    """
+    Camada compartilhada de execução das chamadas ao chat da OpenAI.
+    Executa as requisições de forma assíncrona com limite de requisições e tokens por minuto,
+    número máximo de requisições simultâneas e backoff exponencial que respeita o Retry-After.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_in_flight, max_retries, timeout):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._requests = AsyncTokenBucket(requests_per_minute)
+        self._tokens = AsyncTokenBucket(tokens_per_minute)
+
+    async def _complete(self, client, semaphore, request):
+        estimated_tokens = estimate_request_tokens(request)
+        for attempt in range(self.max_retries + 1):
+            await self._requests.acquire(1)
+            await self._tokens.acquire(estimated_tokens)
+            model = request.get("model", "")
+            try:
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.chat.completions.create(**request, timeout=self.timeout)
+                _record_usage(model, response, time.perf_counter() - started)
+                return response
+            except retryable_errors() as e:
+                metrics.inc("llm_errors", description="Erros nas chamadas à OpenAI por tipo", model=model, error=type(e).__name__)
+                if attempt >= self.max_retries:
+                    raise
+                delay = _retry_after_seconds(e) or (2 ** attempt) + random.uniform(0, 1)
+                logger.warning(f"Erro temporário na OpenAI ({type(e).__name__}), nova tentativa em {delay:.1f}s.")
+                await asyncio.sleep(delay)
+
+    async def _complete_all(self, requests):
+        from openai import AsyncOpenAI
+
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        # Cliente criado no primeiro uso de cada execução (e não na importação), preso ao event loop atual
+        client = AsyncOpenAI(api_key=env.OPENAI_API_KEY, base_url=env.OPENAI_BASE_URL, max_retries=0)
+        try:
+            return await asyncio.gather(
+                *(self._complete(client, semaphore, request) for request in requests),
+                return_exceptions=True,
+            )
+        finally:
+            await client.close()
+
+    def run(self, requests):
+        """
+        Executa uma lista de requisições (kwargs de chat.completions.create) em paralelo.
+        Retorna, na mesma ordem, a resposta de cada requisição ou a exceção que a fez falhar.
+        """
+        if not requests:
+            return []
+        return asyncio.run(self._complete_all(requests))
+
+
+llm_executor = LLMExecutor(
+    requests_per_minute=env.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=env.LLM_TOKENS_PER_MINUTE,
+    max_in_flight=env.LLM_MAX_IN_FLIGHT,
+    max_retries=env.LLM_MAX_RETRIES,
+    timeout=env.LLM_TIMEOUT,
+)
@@ -0,0 +1,177 @@
+import queue
+import random
+import smtplib
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from app.config.environments import env
+from app.config.logs import logger
+from app.config.metrics import metrics
+from app.services.rate_limiter import RateLimiter
+
+
+# Falha de entrega: texto do erro e se é uma recusa definitiva do destinatário (ex.: endereço inexistente)
+DeliveryFailure = namedtuple("DeliveryFailure", ["error", "permanent"])
+
+class SmtpPool:
+    """
+    Pool de conexões SMTP persistentes e autenticadas, reaproveitadas entre os envios.
+    No máximo `size` conexões abertas ao mesmo tempo; a conexão que falha é descartada
+    e substituída por uma nova no próximo uso.
+    """
+
+    def __init__(self, host, port, user=None, password=None, starttls=True, size=2, timeout=30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            self._discard(server)
+            raise
+        logger.info(f"Nova conexão SMTP aberta com {self.host}:{self.port}.")
+        return server
+
+    def _discard(self, server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @contextmanager
+    def connection(self):
+        """
+        Empresta uma conexão do pool (abre uma nova se não houver ociosa).
+        """
+        self._slots.acquire()
+        server = None
+        try:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                server = self._connect()
+            yield server
+        except Exception:
+            if server is not None:
+                self._discard(server)
+                server = None
+            raise
+        finally:
+            if server is not None:
+                self._idle.put(server)
+            self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _is_transient(error):
+    """
+    Falhas temporárias (4xx, desconexão, rede) merecem nova tentativa; respostas 5xx não são repetidas na execução.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, OSError)
+
+
+def _is_bounce(error):
+    """
+    Só a recusa 5xx do próprio destinatário é definitiva. Erros de conexão, autenticação (535) ou do
+    remetente (cota, remetente recusado) não dizem nada sobre o endereço e não podem virar 'bounced'.
+    """
+    return isinstance(error, smtplib.SMTPRecipientsRefused) and all(code >= 500 for code, _ in error.recipients.values())
+
+
+def _is_fatal(error):
+    """
+    Falhas da conta ou do remetente (autenticação, remetente recusado) valem para todas as mensagens:
+    interrompem o envio em vez de repetir o erro para cada destinatário.
+    """
+    return isinstance(error, (smtplib.SMTPAuthenticationError, smtplib.SMTPSenderRefused))
+
+
+def _send_with_retries(pool, limiter, sender, recipient, message, max_retries, backoff, aborted):
+    for attempt in range(max_retries + 1):
+        if aborted.is_set():
+            metrics.inc("smtp_messages", result="aborted")
+            return DeliveryFailure("Envio interrompido por falha de autenticação ou do remetente", False)
+        limiter.acquire()
+        try:
+            with metrics.timer("smtp_send_seconds", "Duração de cada envio SMTP (inclui abrir a conexão)"):
+                with pool.connection() as server:
+                    server.sendmail(sender, [recipient], message)
+            metrics.inc("smtp_messages", description="Mensagens SMTP por resultado", result="sent")
+            return None
+        except Exception as e:
+            if _is_fatal(e):
+                aborted.set()
+            if attempt >= max_retries or not _is_transient(e):
+                metrics.inc("smtp_messages", result="failed")
+                logger.error(f"Falha ao entregar e-mail para {recipient} após {attempt + 1} tentativas: {e}")
+                return DeliveryFailure(str(e) or type(e).__name__, _is_bounce(e))
+            metrics.inc("smtp_messages", result="retry")
+            delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+            logger.warning(f"Erro temporário ao entregar para {recipient}, nova tentativa em {delay:.1f}s: {e}")
+            time.sleep(delay)
+
+
+def deliver_messages(messages, sender, pool=None, rate_per_second=None, max_retries=None, backoff=None):
+    """
+    Entrega mensagens individuais em paralelo pelas conexões do pool, respeitando o limite de envios
+    por segundo e repetindo só os destinatários com falha temporária. Uma falha de autenticação ou do
+    remetente interrompe os envios restantes, que voltam como falha temporária.
+    Recebe lista de tuplas (destinatário, mensagem serializada).
+    Retorna dict destinatário -> None (entregue) ou DeliveryFailure.
+    """
+    if not messages:
+        return {}
+    pool = pool or create_smtp_pool()
+    limiter = RateLimiter(env.MAIL_RATE_PER_SECOND if rate_per_second is None else rate_per_second)
+    max_retries = env.MAIL_MAX_RETRIES if max_retries is None else max_retries
+    backoff = env.MAIL_BACKOFF_SECONDS if backoff is None else backoff
+    aborted = threading.Event()
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="smtp") as executor:
+            futures = {
+                recipient: executor.submit(_send_with_retries, pool, limiter, sender, recipient, message, max_retries, backoff, aborted)
+                for recipient, message in messages
+            }
+            results = {recipient: future.result() for recipient, future in futures.items()}
+    finally:
+        pool.close_all()
+    failed = sum(1 for error in results.values() if error)
+    logger.info(f"Entregas: {len(results) - failed} enviadas, {failed} com falha.")
+    return results
+
+
+def create_smtp_pool():
+    return SmtpPool(
+        host=env.MAIL_SMTP_HOST,
+        port=env.MAIL_SMTP_PORT,
+        user=env.MAIL_USER if env.MAIL_SMTP_AUTH else None,
+        password=env.MAIL_PASSWORD if env.MAIL_SMTP_AUTH else None,
+        starttls=env.MAIL_SMTP_STARTTLS,
+        size=env.MAIL_SMTP_POOL_SIZE,
+        timeout=env.MAIL_SMTP_TIMEOUT,
+    )
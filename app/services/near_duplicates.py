@@ -0,0 +1,112 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+from app.config.environments import env
+from app.config.logs import logger
+from app.database.news_signatures import find_lsh_candidates, save_signatures
+
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+# Textos muito curtos geram assinaturas pouco confiáveis e ficam fora da detecção
+MIN_WORDS = 30
+
+_PRIME = np.uint64((1 << 31) - 1)
+# Semente fixa: as permutações precisam ser as mesmas entre execuções para comparar assinaturas gravadas
+_random = np.random.RandomState(20240501)
+_A = _random.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_B = _random.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+
+def minhash_signature(content):
+    """
+    Calcula a assinatura MinHash do texto a partir de shingles de palavras.
+    Retorna array numpy com NUM_PERM valores, ou None se o texto for curto demais.
+    """
+    words = re.findall(r"\w+", (content or "").lower())
+    if len(words) < MIN_WORDS:
+        return None
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)) % _PRIME
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def lsh_buckets(signature):
+    """
+    Divide a assinatura em bandas e retorna a lista de pares (band, bucket) do índice LSH.
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].astype("<u4").tobytes()
+        bucket = int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), "little", signed=True)
+        buckets.append((band, bucket))
+    return buckets
+
+
+def signature_from_bytes(data):
+    return np.frombuffer(bytes(data), dtype="<u4").astype(np.uint64)
+
+
+def estimate_similarity(signature_a, signature_b):
+    """
+    Estima a similaridade de Jaccard entre dois textos pela fração de posições iguais nas assinaturas.
+    """
+    return float(np.mean(signature_a == signature_b))
+
+
+def link_near_duplicates(news_list, threshold=None):
+    """
+    Detecta quase duplicadas (MinHash + LSH) entre as notícias recebidas e as já indexadas.
+    Grava assinaturas e buckets das notícias novas e retorna dict news_id -> canonical_id
+    apenas para as notícias que são cópias de outra.
+    """
+    threshold = threshold or env.NEAR_DUPLICATE_THRESHOLD
+    news_list = sorted((n for n in news_list if not n.get('duplicate_of')), key=lambda n: n['id'])
+    entries = []
+    for news in news_list:
+        signature = minhash_signature(news.get('raw_content'))
+        if signature is not None:
+            entries.append({'news_id': news['id'], 'signature': signature, 'buckets': lsh_buckets(signature)})
+    if not entries:
+        return {}
+
+    # Candidatos já gravados na base, indexados por bucket
+    batch_ids = {e['news_id'] for e in entries}
+    all_buckets = {bucket for e in entries for bucket in e['buckets']}
+    index = {}
+    known = {}
+    for row in find_lsh_candidates(list(all_buckets)):
+        if row['news_id'] in batch_ids:
+            continue
+        index.setdefault((row['band'], row['bucket']), set()).add(row['news_id'])
+        known[row['news_id']] = (signature_from_bytes(row['signature']), row['duplicate_of'] or row['news_id'])
+
+    duplicates = {}
+    for entry in entries:
+        candidates = set()
+        for bucket in entry['buckets']:
+            candidates |= index.get(bucket, set())
+        best_id, best_similarity = None, threshold
+        for candidate_id in candidates:
+            similarity = estimate_similarity(entry['signature'], known[candidate_id][0])
+            if similarity >= best_similarity:
+                best_id, best_similarity = candidate_id, similarity
+        canonical_id = known[best_id][1] if best_id is not None else entry['news_id']
+        if best_id is not None:
+            duplicates[entry['news_id']] = canonical_id
+        # Indexa a notícia para que as próximas cópias do lote também sejam encontradas
+        known[entry['news_id']] = (entry['signature'], canonical_id)
+        for bucket in entry['buckets']:
+            index.setdefault(bucket, set()).add(entry['news_id'])
+
+    save_signatures([
+        {'news_id': e['news_id'], 'signature': e['signature'].astype("<u4").tobytes(), 'buckets': e['buckets']}
+        for e in entries
+    ])
+    logger.info(f"Quase duplicadas: {len(duplicates)} de {len(entries)} notícias são cópias de outra já existente.")
+    return duplicates
@@ -1,69 +1,219 @@
 import json
 import re
 
-from openai import OpenAI
-
 from app.config.environments import env
 from app.config.logs import logger
-from app.database.raw_news import get_unclassified_news, update_news_relevance, delete_news
+from app.database.llm_cache import evict_llm_cache
+from app.database.raw_news import (
+    iter_unclassified_news, update_news_relevance_bulk, delete_news, mark_duplicates, copy_relevance_to_duplicates
+)
+from app.services import llm_cache
+from app.services.llm_client import llm_executor
+from app.services.prompt_builder import build_messages, condense, count_tokens
+
+
+MODEL = "gpt-5.1"
+# Versão do template de classificação; altere ao mudar o prompt para invalidar o cache
+CLASSIFY_PROMPT_VERSION = "classify-v2"
+
+# Tokens de resposta reservados por notícia na classificação em lote ({id, nota, contexto})
+BATCH_OUTPUT_TOKENS_PER_ITEM = 80
 
 
-client = OpenAI(api_key=env.OPENAI_API_KEY)
+def _build_examples_prompt(user_examples):
+    if not user_examples:
+        return ""
+    prompt = "\nExemplos de notícias que o usuário considera relevantes/irrelevantes:\n"
+    for ex in user_examples:
+        prompt += f"Título: {ex['title']}\nRelevância: {ex['relevance']}\n"
+    return prompt
+
+
+def _parse_single_response(news, response):
+    if isinstance(response, Exception):
+        logger.error(f"Erro na requisição OpenAI para notícia id={news['id']}: {response}")
+        return {'id': news['id'], 'relevance': None, 'context': f'Erro: {response}'}
+    result = (response.choices[0].message.content or "").strip()
+    if not result:
+        logger.error(f"Resposta vazia do modelo para notícia id={news['id']}")
+        return {'id': news['id'], 'relevance': None, 'context': 'Erro: resposta vazia do modelo'}
+    # Extrai JSON da resposta do modelo
+    match = re.search(r"{.*}", result, re.DOTALL)
+    if match:
+        result_json_str = match.group(0)
+    else:
+        result_json_str = result
+    try:
+        result_json = json.loads(result_json_str)
+        return {
+            'id': news['id'],
+            'relevance': result_json.get('nota'),
+            'context': result_json.get('contexto')
+        }
+    except Exception as e:
+        logger.error(f"Resposta bruta do modelo para notícia id={news['id']}: {result}")
+        return {'id': news['id'], 'relevance': None, 'context': f'Erro ao decodificar JSON: {e}'}
 
 
 def classify_news_relevance(news_list, user_examples=None):
     """
     Classifica relevância e contexto das notícias usando IA (OpenAI/GPT).
     Recebe lista de notícias e exemplos do usuário (opcional).
+    As requisições (uma por notícia) são executadas em paralelo pelo llm_executor.
     Retorna lista de dicts com id, nota e contexto.
     """
-    results = []
+    # Parte fixa do prompt primeiro (prefixo igual entre as chamadas); o conteúdo vem cortado no orçamento
+    instructions = (
+        "Você é um especialista em infraestrutura pública. Avalie a relevância da notícia abaixo para o contexto de concessões e PPPs no Brasil.\n"
+        "Dê uma nota de 0 a 10 (onde 0 = irrelevante, 10 = extremamente relevante) e explique o contexto em 1 frase.\n"
+        "Responda SOMENTE no formato JSON, sem explicações extras. Exemplo: {\"nota\": 8, \"contexto\": \"Notícia relevante sobre concessão ferroviária.\"}\n"
+    )
+    instructions += _build_examples_prompt(user_examples)
+    requests = []
     for news in news_list:
-        # Monta prompt para classificação
-        prompt = (
-            "Você é um especialista em infraestrutura pública. Avalie a relevância da notícia abaixo para o contexto de concessões e PPPs no Brasil.\n"
-            "Dê uma nota de 0 a 10 (onde 0 = irrelevante, 10 = extremamente relevante) e explique o contexto em 1 frase.\n"
-            "Responda SOMENTE no formato JSON, sem explicações extras. Exemplo: {\"nota\": 8, \"contexto\": \"Notícia relevante sobre concessão ferroviária.\"}\n"
-        )
-        if user_examples:
-            prompt += "\nExemplos de notícias que o usuário considera relevantes/irrelevantes:\n"
-            for ex in user_examples:
-                prompt += f"Título: {ex['title']}\nRelevância: {ex['relevance']}\n"
-        prompt += f"\nNotícia:\n{news['raw_content']}\n"
+        content = condense(news['raw_content'], env.CLASSIFY_CONTENT_TOKENS, "classificação")
+        requests.append({
+            'model': MODEL,
+            'messages': build_messages(instructions, f"\nNotícia:\n{content}\n"),
+            'max_completion_tokens': 256,
+            'temperature': 0.2,
+        })
+    responses = llm_executor.run(requests)
+    return [_parse_single_response(news, response) for news, response in zip(news_list, responses)]
+
+
+def _parse_batch_response(result, batch_ids):
+    """
+    Extrai do array JSON do modelo os itens válidos ({id, nota, contexto}) cujos ids pertencem ao lote.
+    Retorna dict id -> {'relevance', 'context'}; ids ausentes ou malformados ficam de fora.
+    """
+    match = re.search(r"\[.*\]", result, re.DOTALL)
+    items = json.loads(match.group(0) if match else result)
+    if not isinstance(items, list):
+        return {}
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
         try:
-            response = client.chat.completions.create(
-                model="gpt-5.1",
-                messages=[
-                    {"role": "system", "content": "Você é especialista em infraestrutura pública."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_completion_tokens=256,
-                temperature=0.2,
-            )
-            result = response.choices[0].message.content.strip()
-            if not result:
-                logger.error(f"Resposta vazia do modelo para notícia id={news['id']}")
-                results.append({'id': news['id'], 'relevance': None, 'context': 'Erro: resposta vazia do modelo'})
-                continue
-            # Extrai JSON da resposta do modelo
-            match = re.search(r"{.*}", result, re.DOTALL)
-            if match:
-                result_json_str = match.group(0)
-            else:
-                result_json_str = result
-            try:
-                result_json = json.loads(result_json_str)
-                results.append({
-                    'id': news['id'],
-                    'relevance': result_json.get('nota'),
-                    'context': result_json.get('contexto')
-                })
-            except Exception as e:
-                logger.error(f"Resposta bruta do modelo para notícia id={news['id']}: {result}")
-                results.append({'id': news['id'], 'relevance': None, 'context': f'Erro ao decodificar JSON: {e}'})
+            news_id = int(item.get('id'))
+            nota = float(item.get('nota'))
+        except (TypeError, ValueError):
+            continue
+        if news_id not in batch_ids or news_id in parsed or not 0 <= nota <= 10:
+            continue
+        parsed[news_id] = {'relevance': round(nota), 'context': item.get('contexto')}
+    return parsed
+
+
+def _pack_batches(news_list, contents, token_budget, fixed_tokens):
+    # Agrupa notícias até o orçamento de tokens; uma notícia maior que o orçamento vai sozinha
+    batch = []
+    batch_tokens = fixed_tokens
+    for news in news_list:
+        news_tokens = count_tokens(contents[news['id']]) + BATCH_OUTPUT_TOKENS_PER_ITEM
+        if batch and batch_tokens + news_tokens > token_budget:
+            yield batch
+            batch = []
+            batch_tokens = fixed_tokens
+        batch.append(news)
+        batch_tokens += news_tokens
+    if batch:
+        yield batch
+
+
+def classify_news_relevance_batched(news_list, user_examples=None, token_budget=None):
+    """
+    Classifica várias notícias por requisição, cada uma identificada pelo seu ID.
+    O tamanho de cada lote é definido pelo orçamento de tokens (CLASSIFY_BATCH_TOKEN_BUDGET), com o
+    conteúdo de cada notícia reduzido a CLASSIFY_CONTENT_TOKENS.
+    Notícias ausentes ou malformadas na resposta são reclassificadas individualmente.
+    Retorna lista de dicts com id, nota e contexto.
+    """
+    token_budget = token_budget or env.CLASSIFY_BATCH_TOKEN_BUDGET
+    instructions = (
+        "Você é um especialista em infraestrutura pública. Avalie a relevância de CADA notícia abaixo para o contexto de concessões e PPPs no Brasil.\n"
+        "Para cada notícia, dê uma nota de 0 a 10 (onde 0 = irrelevante, 10 = extremamente relevante) e explique o contexto em 1 frase.\n"
+        "Responda SOMENTE com um array JSON contendo um objeto por notícia, usando o ID informado, sem explicações extras. "
+        "Exemplo: [{\"id\": 12, \"nota\": 8, \"contexto\": \"Notícia relevante sobre concessão ferroviária.\"}]\n"
+    )
+    instructions += _build_examples_prompt(user_examples)
+    fixed_tokens = count_tokens(instructions)
+    contents = {news['id']: condense(news['raw_content'], env.CLASSIFY_CONTENT_TOKENS, "classificação") for news in news_list}
+
+    results = []
+    retry = []
+    batches = []
+    requests = []
+    for batch in _pack_batches(news_list, contents, token_budget, fixed_tokens):
+        if len(batch) == 1:
+            retry.extend(batch)
+            continue
+        body = "\nNotícias:\n" + "".join(f"ID: {news['id']}\n{contents[news['id']]}\n---\n" for news in batch)
+        batches.append(batch)
+        requests.append({
+            'model': MODEL,
+            'messages': build_messages(instructions, body),
+            'max_completion_tokens': BATCH_OUTPUT_TOKENS_PER_ITEM * len(batch) + 64,
+            'temperature': 0.2,
+        })
+
+    responses = llm_executor.run(requests)
+    for batch, response in zip(batches, responses):
+        parsed = {}
+        try:
+            if isinstance(response, Exception):
+                raise response
+            result = (response.choices[0].message.content or "").strip()
+            parsed = _parse_batch_response(result, {news['id'] for news in batch})
         except Exception as e:
-            logger.error(f"Erro na requisição OpenAI para notícia id={news['id']}: {e}")
-            results.append({'id': news['id'], 'relevance': None, 'context': f'Erro: {e}'})
+            logger.error(f"Erro na classificação em lote ({len(batch)} notícias): {e}")
+        for news in batch:
+            if news['id'] in parsed:
+                results.append({'id': news['id'], **parsed[news['id']]})
+            else:
+                retry.append(news)
+        logger.info(f"Lote classificado: {len(parsed)}/{len(batch)} notícias com resposta válida.")
+
+    if retry:
+        logger.info(f"{len(retry)} notícias serão classificadas individualmente.")
+        results.extend(classify_news_relevance(retry, user_examples))
+    return results
+
+
+def classify_news_relevance_cached(news_list, user_examples=None):
+    """
+    Classifica reaproveitando o cache de respostas para conteúdos já avaliados.
+    Conteúdos repetidos (ex.: mesma matéria em vários portais) são enviados uma única vez ao modelo.
+    Retorna lista de dicts com id, nota e contexto.
+    """
+    examples = _build_examples_prompt(user_examples)
+    keys = {news['id']: llm_cache.make_cache_key(MODEL, CLASSIFY_PROMPT_VERSION, examples, str(env.CLASSIFY_CONTENT_TOKENS), news['raw_content']) for news in news_list}
+    cached = llm_cache.lookup(keys.values(), "classificação")
+
+    to_classify = {}
+    for news in news_list:
+        key = keys[news['id']]
+        if key not in cached and key not in to_classify:
+            to_classify[key] = news
+    if env.CLASSIFY_BATCH_TOKEN_BUDGET > 0:
+        fresh = classify_news_relevance_batched(list(to_classify.values()), user_examples)
+    else:
+        fresh = classify_news_relevance(list(to_classify.values()), user_examples)
+
+    fresh_by_key = {keys[r['id']]: r for r in fresh}
+    llm_cache.store({
+        key: {'relevance': r['relevance'], 'context': r['context']}
+        for key, r in fresh_by_key.items()
+        if r['relevance'] is not None
+    })
+
+    results = []
+    for news in news_list:
+        key = keys[news['id']]
+        answer = cached.get(key) or fresh_by_key.get(key)
+        if answer is not None:
+            results.append({'id': news['id'], 'relevance': answer['relevance'], 'context': answer['context']})
     return results
 
 
@@ -88,19 +238,50 @@ def filter_out_portugal_news(list):
     return filtered_list
 
 
-def classify_and_update_all(user_examples=None):
+def classify_and_update(news_list, user_examples=None):
     """
-    Busca notícias não classificadas, classifica com IA e atualiza no banco.
-    Loga quantidade processada.
+    Classifica uma lista de notícias ({'id', 'raw_content', 'url', 'duplicate_of'}) e grava o resultado no banco.
+    Remove notícias de Portugal, vincula quase duplicadas, aplica o pré-filtro local e só então chama a IA.
+    Retorna o total de notícias classificadas pela IA.
     """
-    news_list = get_unclassified_news()
-    if not news_list:
-        logger.info("Nenhuma notícia nova para classificar.")
-        return
+    # numpy/scipy só são carregados quando há notícias para classificar
+    from app.services.near_duplicates import link_near_duplicates
+    from app.services.relevance_prefilter import prefilter_news
 
     filtered_news_list = filter_out_portugal_news(news_list)
 
-    results = classify_news_relevance(filtered_news_list, user_examples)
-    for r in results:
-        update_news_relevance(r['id'], r['relevance'], r['context'])
-    logger.info(f"{len(results)} notícias classificadas e atualizadas.")
+    # Só os representantes canônicos vão para a IA; as quase duplicadas herdam o resultado
+    duplicates = link_near_duplicates(filtered_news_list)
+    mark_duplicates(duplicates)
+    filtered_news_list = [n for n in filtered_news_list if not n.get('duplicate_of') and n['id'] not in duplicates]
+
+    # Notícias claramente irrelevantes pelo pré-filtro local são gravadas sem chamar a IA
+    filtered_news_list, rejected = prefilter_news(filtered_news_list)
+    update_news_relevance_bulk(rejected)
+
+    # Grava os resultados em blocos durante a classificação para não perder trabalho em caso de falha
+    FLUSH_SIZE = env.CLASSIFY_FLUSH_SIZE
+    classified = 0
+    updated = 0
+    for i in range(0, len(filtered_news_list), FLUSH_SIZE):
+        batch = filtered_news_list[i:i+FLUSH_SIZE]
+        results = classify_news_relevance_cached(batch, user_examples)
+        updated += update_news_relevance_bulk(results)
+        classified += len(results)
+    logger.info(f"{classified} notícias classificadas e {updated} atualizadas.")
+    copy_relevance_to_duplicates()
+    return classified
+
+
+def classify_and_update_all(user_examples=None):
+    """
+    Busca notícias não classificadas (em lotes paginados por id), classifica com IA e atualiza no banco.
+    Loga quantidade processada.
+    """
+    evict_llm_cache()
+    found = False
+    for news_list in iter_unclassified_news():
+        found = True
+        classify_and_update(news_list, user_examples)
+    if not found:
+        logger.info("Nenhuma notícia nova para classificar.")
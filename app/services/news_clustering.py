@@ -0,0 +1,93 @@
+import re
+import zlib
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from app.config.environments import env
+from app.services.prompt_builder import lead
+
+
+N_FEATURES = 2 ** 18
+LEAD_CHARS = 600
+SIMILARITY_BATCH_SIZE = 1000
+
+
+def tokenize(content):
+    """
+    Gera os termos do texto: palavras (a partir de 3 letras) e bigramas.
+    """
+    words = [w for w in re.findall(r"\w+", (content or "").lower()) if len(w) > 2 and not w.isdigit()]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def hashed_term_counts(texts, n_features=N_FEATURES):
+    """
+    Conta os termos de cada texto em colunas obtidas por hashing (sem vocabulário).
+    Retorna matriz esparsa CSR (textos x n_features).
+    """
+    rows, cols, data = [], [], []
+    for row, content in enumerate(texts):
+        terms = tokenize(content)
+        if not terms:
+            continue
+        hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in terms), dtype=np.int64, count=len(terms)) % n_features
+        columns, counts = np.unique(hashes, return_counts=True)
+        rows.extend([row] * len(columns))
+        cols.extend(columns.tolist())
+        data.extend(counts.tolist())
+    return sparse.csr_matrix((np.asarray(data, dtype=np.float64), (rows, cols)), shape=(len(texts), n_features))
+
+
+def tfidf_matrix(texts, n_features=N_FEATURES):
+    """
+    Vetoriza os textos com TF-IDF sobre termos com hashing, normalizado (L2) por linha.
+    """
+    counts = hashed_term_counts(texts, n_features)
+    document_frequency = np.bincount(counts.indices, minlength=n_features)
+    idf = np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1
+    tfidf = counts.copy()
+    tfidf.data = np.log1p(tfidf.data) * idf[tfidf.indices]
+    norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ tfidf
+
+
+def cluster_by_similarity(matrix, threshold, batch_size=SIMILARITY_BATCH_SIZE):
+    """
+    Agrupa as linhas cuja similaridade de cosseno é >= threshold (componentes conexos).
+    Calcula a similaridade em blocos de linhas para limitar o uso de memória e filtra as arestas
+    acima do limite com numpy, sem percorrer em Python os pares de baixa similaridade.
+    Retorna lista de clusters (listas de índices), maiores primeiro.
+    """
+    n = matrix.shape[0]
+    transposed = matrix.T.tocsc()
+    rows, cols = [], []
+    for start in range(0, n, batch_size):
+        similarities = (matrix[start:start + batch_size] @ transposed).tocoo()
+        row = similarities.row + start
+        mask = (similarities.data >= threshold) & (row < similarities.col)
+        rows.append(row[mask])
+        cols.append(similarities.col[mask])
+    rows = np.concatenate(rows) if rows else np.array([], dtype=int)
+    cols = np.concatenate(cols) if cols else np.array([], dtype=int)
+    graph = sparse.coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    clusters = {}
+    for i, label in enumerate(labels):
+        clusters.setdefault(label, []).append(i)
+    return sorted(clusters.values(), key=len, reverse=True)
+
+
+def candidate_clusters(news_list, threshold=None):
+    """
+    Forma clusters candidatos de notícias pelo título e início do conteúdo, sem chamar a IA.
+    Retorna lista de listas de notícias.
+    """
+    if not news_list:
+        return []
+    threshold = threshold or env.CLUSTER_SIMILARITY_THRESHOLD
+    texts = [f"{n.get('title') or ''} {lead(n.get('raw_content') or '', LEAD_CHARS)}" for n in news_list]
+    clusters = cluster_by_similarity(tfidf_matrix(texts), threshold)
+    return [[news_list[i] for i in cluster] for cluster in clusters]
@@ -1,16 +1,23 @@
 import re
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-
-import requests
-from serpapi import GoogleSearch
-from newspaper import Article
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from urllib.parse import urlparse
 
 from app.config.logs import logger
+from app.config.metrics import metrics
 from app.config.environments import env
+from app.services.browser_pool import browser_pool
+from app.services.html_cache import html_cache
+from app.services.search_cache import cached_search, log_search_cache_stats
+from app.services.search_scheduler import SearchSource, fan_out_search
+from app.services.search_watermarks import WatermarkTracker
+from app.services.url_canonicalizer import canonicalize_url
 from app.database.filters import get_filters
-from app.database.raw_news import insert_raw_news, get_existing_urls
+from app.database.search_cache import evict_search_cache
+from app.database.raw_news import insert_raw_news_bulk, find_existing_urls
 
 
 def convert_relative_time(value, search_date):
@@ -31,49 +38,212 @@ def convert_relative_time(value, search_date):
         return None
 
 
+# requests, serpapi, newspaper3k e selenium são importados dentro das funções que os usam:
+# os pontos de entrada que só importam este módulo não pagam o custo de carregá-los.
+
+
+def _decode_html(response):
+    import requests
+
+    # Mesmo critério do Newspaper3k: sem charset no cabeçalho, usa o declarado no próprio HTML
+    if response.encoding == "ISO-8859-1" and "charset" not in response.headers.get("content-type", ""):
+        encodings = requests.utils.get_encodings_from_content(response.text)
+        if encodings:
+            response.encoding = encodings[0]
+    return response.text or ""
+
+
+def _download_html(url, article):
+    """
+    Baixa o HTML da notícia reaproveitando o cache em disco: usa a cópia sem consultar o site
+    enquanto estiver válida e, depois disso, faz GET condicional (ETag/Last-Modified).
+    """
+    import requests
+
+    cached = html_cache.get(url) if env.HTML_CACHE_ENABLED else None
+    if cached and cached['fresh']:
+        metrics.inc("html_downloads", description="Downloads de HTML por resultado do cache", result="cache_fresh")
+        return cached['html']
+    headers = {'User-Agent': article.config.browser_user_agent}
+    if cached and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached['last_modified']:
+        headers['If-Modified-Since'] = cached['last_modified']
+    response = requests.get(url, headers=headers, timeout=env.EXTRACTION_TIMEOUT)
+    if response.status_code == 304 and cached:
+        metrics.inc("html_downloads", result="not_modified")
+        html_cache.touch(url)
+        return cached['html']
+    metrics.inc("html_downloads", result="downloaded")
+    response.raise_for_status()
+    html = _decode_html(response)
+    if env.HTML_CACHE_ENABLED:
+        html_cache.put(url, html, etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
+    return html
+
+
+def _render_html(url):
+    """
+    Renderiza a página no Chrome do pool, reaproveitando o HTML renderizado em cache quando válido.
+    """
+    from selenium.common.exceptions import TimeoutException
+
+    cached = html_cache.get(url, "selenium") if env.HTML_CACHE_ENABLED else None
+    if cached and cached['fresh']:
+        return cached['html']
+    with browser_pool.browser() as driver:
+        try:
+            driver.get(url)
+        except TimeoutException:
+            # Aproveita o que já foi renderizado em vez de descartar a página
+            logger.info(f"Timeout no carregamento, usando HTML parcial: {url}")
+            driver.execute_script("window.stop();")
+        html = driver.page_source
+    if env.HTML_CACHE_ENABLED:
+        html_cache.put(url, html, "selenium")
+    return html
+
+
 def extract_content(url):
     """
     Extrai o texto principal de uma notícia a partir da URL.
     Usa Newspaper3k e, se falhar, tenta Selenium como fallback. Loga erros em caso de falha.
+    O HTML obtido pelos dois caminhos fica no cache em disco (html_cache).
+    A duração fica nas métricas pelo caminho que resolveu a extração (newspaper, selenium ou falha).
     """
-    article = Article(url)
+    started = time.perf_counter()
+    path = "failed"
+    try:
+        text, path = _extract_content(url)
+        return text
+    finally:
+        metrics.observe("extraction_seconds", time.perf_counter() - started, "Duração da extração de conteúdo por caminho", path=path)
+        metrics.inc("extractions", description="Extrações de conteúdo por caminho", path=path)
+
+
+def _extract_content(url):
+    from newspaper import Article
+
+    article = Article(url, request_timeout=env.EXTRACTION_TIMEOUT)
     # 1. Tenta download usando o Newspaper3k
     try:
-        article.download()
+        article.set_html(_download_html(url, article))
         article.parse()
         if article.text and len(article.text.strip()) > 0:
-            return article.text
+            return article.text, "newspaper"
     except Exception as e:
         pass
     # 2. Fallback: Selenium sempre que o Newspaper3k falhar
     try:
         logger.info(f"Tentando Selenium para extrair conteúdo: {url}")
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.get(url)
-        html = driver.page_source
-        article.set_html(html)
-        driver.quit()
+        article.set_html(_render_html(url))
         article.parse()
         if article.text and len(article.text.strip()) > 0:
-            return article.text
+            return article.text, "selenium"
     except Exception as e3:
         logger.error(f"Error downloading content (Selenium fallback): {e3} | URL: {url}")
-        return None
+        return None, "failed"
     logger.error(f"Error extracting text: Não foi possível extrair conteúdo de nenhuma forma | URL: {url}")
+    return None, "failed"
+
+
+def extract_from_cache(url):
+    """
+    Reextrai o texto de uma notícia a partir do HTML em cache, sem acessar a rede.
+    Permite reprocessar crawls anteriores para comparar versões do parser.
+    """
+    from newspaper import Article
+
+    for variant in ("http", "selenium"):
+        cached = html_cache.get(url, variant)
+        if not cached:
+            continue
+        article = Article(url)
+        article.set_html(cached['html'])
+        article.parse()
+        if article.text and len(article.text.strip()) > 0:
+            return article.text
     return None
 
 
-def fetch_google_news(term, api_key):
+_domain_semaphores = {}
+_domain_semaphores_lock = threading.Lock()
+
+
+def _get_domain_semaphore(domain):
+    with _domain_semaphores_lock:
+        semaphore = _domain_semaphores.get(domain)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(max(1, env.EXTRACTION_MAX_PER_DOMAIN))
+            _domain_semaphores[domain] = semaphore
+        return semaphore
+
+
+def extract_content_limited(url):
+    """
+    Extrai o conteúdo respeitando o limite de conexões simultâneas do domínio da URL.
+    Nunca levanta exceção: em caso de erro retorna None.
+    """
+    with _get_domain_semaphore(urlparse(url).netloc.lower()):
+        try:
+            return extract_content(url)
+        except Exception as e:
+            logger.error(f"Erro inesperado ao extrair conteúdo: {e} | URL: {url}")
+            return None
+
+
+def extract_contents(urls, max_workers=None):
+    """
+    Extrai o conteúdo de várias URLs em paralelo.
+    Respeita o limite global de downloads simultâneos e o limite por domínio.
+    Retorna lista de conteúdos (ou None) na mesma ordem das URLs recebidas.
+    """
+    if not urls:
+        return []
+    max_workers = max(1, max_workers or env.EXTRACTION_MAX_WORKERS)
+
+    # Intercala os domínios na ordem de submissão para que os workers não fiquem
+    # parados esperando o limite de um mesmo domínio
+    by_domain = defaultdict(deque)
+    for index, url in enumerate(urls):
+        by_domain[urlparse(url).netloc.lower()].append(index)
+    schedule = []
+    while by_domain:
+        for domain in list(by_domain):
+            schedule.append((by_domain[domain].popleft(), domain))
+            if not by_domain[domain]:
+                del by_domain[domain]
+
+    contents = [None] * len(urls)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract") as executor:
+        futures = {executor.submit(extract_content_limited, urls[index]): index for index, _ in schedule}
+        for future, index in futures.items():
+            contents[index] = future.result()
+    return contents
+
+
+def _serpapi_get_dict(params):
+    from serpapi import GoogleSearch
+
+    search = GoogleSearch(params)
+    if env.SERPAPI_BASE_URL:
+        search.BACKEND = env.SERPAPI_BASE_URL
+    return search.get_dict()
+
+
+def _raise_for_serpapi_error(results):
+    error = results.get("error")
+    # Ausência de resultados vem como "erro" da SerpApi, mas não deve gerar nova tentativa
+    if error and "hasn't returned any results" not in error:
+        raise RuntimeError(f"SerpApi: {error}")
+
+
+def fetch_google_news(term, api_key, raise_errors=False, watermark=None):
     """
     Busca notícias no Google News via SerpApi para um termo.
     Retorna lista de dicionários com dados das notícias.
+    Com raise_errors=True propaga falhas da API para permitir novas tentativas.
+    Com `watermark` descarta as notícias já vistas em execuções anteriores.
     """
     params = {
         "engine": "google_news",
@@ -83,8 +253,9 @@ def fetch_google_news(term, api_key):
         "api_key": api_key
     }
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = cached_search(params, _serpapi_get_dict)
+        if raise_errors:
+            _raise_for_serpapi_error(results)
         articles = results.get("news_results", [])
         news = []
         for art in articles:
@@ -101,16 +272,22 @@ def fetch_google_news(term, api_key):
                 'search_engine': 'google_news',
                 'raw_content': None  
             })
+        if watermark:
+            news, _ = watermark.cut(news)
         return news
     except Exception as e:
+        if raise_errors:
+            raise
         logger.error(f"Error fetching Google News: {e}")
         return []
 
 
-def fetch_bing_news(term, api_key):
+def fetch_bing_news(term, api_key, raise_errors=False, watermark=None):
     """
-    Busca notícias no Bing News via SerpApi para um termo.
+    Busca notícias no Bing News via SerpApi para um termo, paginando até SEARCH_MAX_PAGES.
     Retorna lista de dicionários com dados das notícias.
+    Com raise_errors=True propaga falhas da API para permitir novas tentativas.
+    Com `watermark` descarta as notícias já vistas e para de paginar ao alcançá-las.
     """
     params = {
         "engine": "bing_news",
@@ -120,33 +297,51 @@ def fetch_bing_news(term, api_key):
         "api_key": api_key
     }
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        articles = results.get("organic_results", [])
-        search_date = datetime.now()
         news = []
-        for art in articles:
-            date_str = art.get('date', '')
-            published_at = convert_relative_time(date_str, search_date) if date_str else None
-            news.append({
-                'published_at': published_at,
-                'title': art.get('title'),
-                'source': art.get('source'),
-                'url': art.get('link'),
-                'search_engine': 'bing_news',
-                'raw_content': None  
-            })
+        offset = 0
+        for _ in range(max(1, env.SEARCH_MAX_PAGES)):
+            page_params = {**params, "first": offset + 1} if offset else params
+            results = cached_search(page_params, _serpapi_get_dict)
+            if raise_errors:
+                _raise_for_serpapi_error(results)
+            articles = results.get("organic_results", [])
+            search_date = datetime.now()
+            page_news = []
+            for art in articles:
+                date_str = art.get('date', '')
+                published_at = convert_relative_time(date_str, search_date) if date_str else None
+                page_news.append({
+                    'published_at': published_at,
+                    'title': art.get('title'),
+                    'source': art.get('source'),
+                    'url': art.get('link'),
+                    'search_engine': 'bing_news',
+                    'raw_content': None  
+                })
+            offset += len(articles)
+            reached_seen = False
+            if watermark:
+                page_news, reached_seen = watermark.cut(page_news)
+            news.extend(page_news)
+            if not articles or reached_seen:
+                break
         return news
     except Exception as e:
+        if raise_errors:
+            raise
         logger.error(f"Error fetching Bing News: {e}")
         return []
 
 
-def fetch_alerta_licitacao(term, api_key): # Validar se a lógica faz sentido
+def fetch_alerta_licitacao(term, api_key, raise_errors=False, watermark=None): # Validar se a lógica faz sentido
     """
     Busca licitações via API Alerta Licitação.
     Mapeia o retorno para o formato padrão do sistema.
+    Com raise_errors=True propaga falhas da API para permitir novas tentativas.
+    Com `watermark` descarta as licitações já vistas em execuções anteriores.
     """
+    import requests
+
     url = "https://alertalicitacao.com.br/api/v1/licitacoesAbertas/"
     
     headers = {
@@ -159,9 +354,11 @@ def fetch_alerta_licitacao(term, api_key): # Validar se a lógica faz sentido
     }
 
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = requests.get(url, headers=headers, params=params, timeout=env.EXTRACTION_TIMEOUT)
         
         if response.status_code != 200:
+            if raise_errors:
+                raise RuntimeError(f"Erro API Alerta Licitação: {response.status_code} - {response.text}")
             logger.error(f"Erro API Alerta Licitação: {response.status_code} - {response.text}")
             return []
 
@@ -185,63 +382,136 @@ def fetch_alerta_licitacao(term, api_key): # Validar se a lógica faz sentido
                 'search_engine': 'alerta_licitacao',
                 'raw_content': f"Modalidade: {lic.get('tipo')}. Objeto: {lic.get('objeto')}. Município: {lic.get('municipio')}-{lic.get('uf')}"
             })
-            
+
+        if watermark:
+            results, _ = watermark.cut(results)
         return results
 
     except Exception as e:
+        if raise_errors:
+            raise
         logger.error(f"Error fetching Alerta Licitação: {e}")
         return []
 
 
-def fetch_and_extract_news():
+def _prepare_search():
+    """
+    Valida as chaves de API e monta os termos e as fontes de busca.
+    """
+    google_api_key = env.GOOGLE_NEWS_API_KEY
+    bing_api_key = env.BING_NEWS_API_KEY
+    alerta_api_key = env.ALERTA_LICITACAO_API_KEY
+
+    if not google_api_key or not bing_api_key or not alerta_api_key:
+        raise ValueError("Google News API key and Bing News API key must be provided.")
+
+    terms = get_filters()
+
+    if not terms or len(terms) == 0:
+        raise ValueError("No search terms found. Please configure filters in the database.")
+
+    if env.SEARCH_CACHE_ENABLED:
+        evict_search_cache()
+
+    sources = [
+        SearchSource('google_news', fetch_google_news, google_api_key, env.SEARCH_RATE_LIMIT_GOOGLE),
+        SearchSource('bing_news', fetch_bing_news, bing_api_key, env.SEARCH_RATE_LIMIT_BING),
+        # SearchSource('alerta_licitacao', fetch_alerta_licitacao, alerta_api_key, env.SEARCH_RATE_LIMIT_ALERTA),
+    ]
+    return terms, sources
+
+
+def iter_new_news(watermarks=None):
+    """
+    Executa as buscas em paralelo e gera, à medida que chegam, as notícias ainda não vistas
+    nesta execução nem gravadas na base. Usado pelo pipeline em streaming.
+    Com `watermarks` (WatermarkTracker) as buscas param no que já foi visto em execuções anteriores
+    e as notícias novas são registradas; cabe ao chamador gravar as marcas após inserir as notícias.
+    """
+    terms, sources = _prepare_search()
+    if watermarks:
+        watermarks.load(terms)
+    seen_urls = set()
+    for term, engine, news in fan_out_search(terms, sources, watermarks=watermarks):
+        logger.info(f"{len(news)} notícias encontradas ({engine} | termo: {term})")
+        if watermarks:
+            watermarks.observe(term, engine, news)
+        candidates = []
+        for n in news:
+            if not n['url']:
+                continue
+            n['canonical_url'] = canonicalize_url(n['url'])
+            if n['canonical_url'] not in seen_urls:
+                seen_urls.add(n['canonical_url'])
+                candidates.append(n)
+        existing_urls = find_existing_urls([url for n in candidates for url in (n['url'], n['canonical_url'])])
+        existing = []
+        for n in candidates:
+            if n['url'] in existing_urls or n['canonical_url'] in existing_urls:
+                logger.info(f"Pulei extração: notícia já existe na base ({n['title']} | {n['url']})")
+                existing.append(n)
+                continue
+            yield n
+        if watermarks:
+            watermarks.confirm(existing)
+    log_search_cache_stats()
+
+
+def fetch_and_extract_news(watermarks=None):
     """
     Busca notícias usando filtros, remove duplicadas, ordena por data e extrai conteúdo.
     Retorna lista final de notícias para análise/classificação.
+    Com `watermarks` as buscas param no que já foi visto (ver iter_new_news).
     """
     try:
-        google_api_key = env.GOOGLE_NEWS_API_KEY
-        bing_api_key = env.BING_NEWS_API_KEY
-        alerta_api_key = env.ALERTA_LICITACAO_API_KEY
-
-        if not google_api_key or not bing_api_key or not alerta_api_key:
-            raise ValueError("Google News API key and Bing News API key must be provided.")
-
-        terms = get_filters()
-
-        if not terms or len(terms) == 0:
-            raise ValueError("No search terms found. Please configure filters in the database.")
-
-        all_news = []
-        for term in terms:
-            google_news = fetch_google_news(term, google_api_key)
-            bing_news = fetch_bing_news(term, bing_api_key)
-            # licitacoes = fetch_alerta_licitacao(term, alerta_api_key)
-            all_news.extend(google_news)
-            all_news.extend(bing_news)
-            # all_news.extend(licitacoes)
-        # Deduplicação por URL
+        terms, sources = _prepare_search()
+        if watermarks:
+            watermarks.load(terms)
+        # Buscas em paralelo com deduplicação por URL canônica à medida que os resultados chegam
         seen_urls = set()
         unique_news = []
-        for n in all_news:
-            if n['url'] and n['url'] not in seen_urls:
-                seen_urls.add(n['url'])
-                unique_news.append(n)
+        for term, engine, news in fan_out_search(terms, sources, watermarks=watermarks):
+            logger.info(f"{len(news)} notícias encontradas ({engine} | termo: {term})")
+            if watermarks:
+                watermarks.observe(term, engine, news)
+            for n in news:
+                if not n['url']:
+                    continue
+                n['canonical_url'] = canonicalize_url(n['url'])
+                if n['canonical_url'] not in seen_urls:
+                    seen_urls.add(n['canonical_url'])
+                    unique_news.append(n)
+        log_search_cache_stats()
         # Ordena por data (mais recente primeiro)
         sorted_news = sorted(unique_news, key=lambda x: x['published_at'] or datetime.min, reverse=True)
 
-        existing_urls = get_existing_urls()
-        # Extrai conteúdo de cada notícia
+        existing_urls = find_existing_urls([url for n in sorted_news for url in (n['url'], n['canonical_url'])])
+        # Extrai conteúdo das notícias novas em paralelo, mantendo a ordem por data
+        to_extract = []
+        existing = []
         for n in sorted_news:
-            if n['url'] in existing_urls:
+            if n['url'] in existing_urls or n['canonical_url'] in existing_urls:
                 logger.info(f"Pulei extração: notícia já existe na base ({n['title']} | {n['url']})")
+                existing.append(n)
                 continue
-            
-            n['raw_content'] = n['raw_content'] or extract_content(n['url'])
-            
+            if not n['raw_content']:
+                to_extract.append(n)
+
+        logger.info(f"Extraindo conteúdo de {len(to_extract)} notícias ({env.EXTRACTION_MAX_WORKERS} em paralelo)...")
+        contents = extract_contents([n['url'] for n in to_extract])
+        for n, content in zip(to_extract, contents):
+            n['raw_content'] = content
+        if watermarks:
+            watermarks.confirm(existing)
+
         return sorted_news
     except Exception as e:
         logger.error(f"Erro inesperado em fetch_and_extract_news: {e}")
         return []
+    finally:
+        browser_pool.close_all()
+        if env.HTML_CACHE_ENABLED:
+            html_cache.evict()
 
 
 def process_news():
@@ -250,19 +520,19 @@ def process_news():
     Loga o total de inseridas e duplicadas.
     """
     logger.info("Buscando notícias...")
-    news_list = fetch_and_extract_news()
+    watermarks = WatermarkTracker()
+    news_list = fetch_and_extract_news(watermarks)
     logger.info(f"Total de notícias encontradas: {len(news_list)}")
 
-    inserted = 0
-    duplicated = 0
+    reports = insert_raw_news_bulk(news_list)
+    inserted = sum(len(r['inserted']) for r in reports)
+    duplicated = sum(len(r['duplicated']) + len(r['failed']) for r in reports)
     for i, news in enumerate(news_list, 1):
-        result = insert_raw_news(news)
-        if result:
-            inserted += 1
-        else:
-            duplicated += 1
         logger.info(f"{i}. {news['title']} | Fonte: {news['source']} | URL: {news['url']}")
         logger.info(f"Conteúdo (primeiros 100 chars): {news['raw_content'][:100] if news['raw_content'] else 'N/A'}\n")
 
     logger.info(f"Notícias inseridas: {inserted}")
-    logger.info(f"Ignoradas por duplicidade/erro: {duplicated}")
\ No newline at end of file
+    logger.info(f"Ignoradas por duplicidade/erro: {duplicated}")
+    stored = {url for r in reports for url in r['inserted'] + r['duplicated']}
+    watermarks.confirm([n for n in news_list if n['url'] in stored])
+    watermarks.save()
\ No newline at end of file
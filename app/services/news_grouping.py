@@ -1,65 +1,125 @@
 import json
 import re
 
-from openai import OpenAI
-
 from app.config.environments import env
 from app.config.logs import logger
 from app.database.raw_news import get_relevant_news
 from app.database.relevant_news import insert_relevant_news
+from app.services import llm_cache
+from app.services.llm_client import llm_executor
+from app.services.prompt_builder import build_messages, condense
+
+
+MODEL = "gpt-5.1"
+# Versão do template de headline/resumo; altere ao mudar o prompt para invalidar o cache
+SUMMARY_PROMPT_VERSION = "summary-v2"
+SUMMARY_MIN_CONTENT_TOKENS = 40
 
+# Partes fixas dos prompts (enviadas antes do conteúdo variável, com prefixo igual entre as chamadas)
+GROUPING_INSTRUCTIONS = (
+    "As notícias abaixo já foram pré-agrupadas por similaridade em clusters candidatos.\n"
+    "Confirme cada cluster ou corrija-o: separe notícias que não tratam do mesmo projeto, concessão ou evento e junte clusters que tratam do mesmo assunto.\n"
+    "Dê um nome curto de tema para cada grupo final.\n"
+    "Retorne SOMENTE em JSON, no formato: [{\"tema\": <nome do tema>, \"ids\": [id1, id2, ...]}].\n"
+)
+# Headline/resumo: o tema e as notícias vêm depois para manter o prefixo igual entre grupos
+SUMMARY_INSTRUCTIONS = (
+    "Gere um headline (máx 120 caracteres) e um resumo (máx 250 tokens) para o grupo de notícias abaixo.\n"
+    "Responda EXATAMENTE neste formato, cada item em uma linha separada, sem texto extra:\n"
+    "HEADLINE | <headline aqui>\n"
+    "RESUMO | <resumo aqui>\n"
+    "Não inclua explicações, apenas o texto no formato acima.\n"
+)
 
-client = OpenAI(api_key=env.OPENAI_API_KEY)
+
+def _pack_clusters(clusters, max_items):
+    # Monta os prompts com clusters inteiros; clusters maiores que o limite (encadeados pela ligação
+    # simples) são divididos, para a resposta em JSON não ser cortada pelo limite de tokens
+    batch = []
+    pieces = (cluster[i:i + max_items] for cluster in clusters for i in range(0, len(cluster), max_items))
+    for cluster in pieces:
+        if batch and sum(len(c) for c in batch) + len(cluster) > max_items:
+            yield batch
+            batch = []
+        batch.append(cluster)
+    if batch:
+        yield batch
 
 
 def group_news_by_theme(news_list):
     """
-    Usa IA para agrupar notícias por tema/projeto.
-    Retorna lista de grupos: [{'tema': ..., 'news_ids': [...], 'contextos': [...], 'titulos': [...], 'contents': [...]}]
+    Agrupa notícias por tema/projeto em duas etapas: clusters candidatos locais (TF-IDF + similaridade
+    de cosseno sobre todo o backlog) e confirmação/refino dos clusters e nome do tema pela IA.
+    Os prompts são enviados em paralelo pelo llm_executor.
+    Retorna lista de grupos: [{'tema': ..., 'ids': [...]}]
     """
-    
-    # Processa em lotes menores para evitar excesso de contexto
-    BATCH_SIZE = 25
+    # numpy/scipy só são carregados quando há notícias para agrupar
+    from app.services.news_clustering import candidate_clusters
+
+    clusters = candidate_clusters(news_list)
+    logger.info(f"{len(clusters)} clusters candidatos formados localmente para {len(news_list)} notícias.")
+
+    batches = list(_pack_clusters(clusters, env.GROUPING_MAX_ITEMS_PER_PROMPT))
+    requests = []
+    for batch in batches:
+        content = ""
+        for number, cluster in enumerate(batch, 1):
+            content += f"\nCluster {number}:\n"
+            for n in cluster:
+                content += f"ID: {n['id']} | {n['title']}\n"
+        requests.append({
+            'model': MODEL,
+            'messages': build_messages(GROUPING_INSTRUCTIONS, content),
+            'max_completion_tokens': 2048,
+            'temperature': 0.2,
+        })
+
     all_groups = []
-    for i in range(0, len(news_list), BATCH_SIZE):
-        batch = news_list[i:i+BATCH_SIZE]
-        prompt = (
-            "Agrupe as notícias abaixo por tema/projeto. Cada grupo deve conter notícias que tratam do mesmo projeto, concessão ou evento, mesmo que usem palavras diferentes.\n"
-            "Retorne SOMENTE em JSON, no formato: [{\"tema\": <nome do tema>, \"ids\": [id1, id2, ...]}].\n"
-            "Notícias:\n"
-        )
-        for n in batch:
-            # Reduz o conteúdo enviado para 200 caracteres
-            prompt += f"ID: {n['id']}\nTítulo: {n['title']}\nConteúdo: {n['raw_content'][:200]}\n---\n"
+    for batch, response in zip(batches, llm_executor.run(requests)):
+        if isinstance(response, Exception):
+            logger.error(f"Erro ao agrupar notícias por tema: {response}")
+            continue
+        result = (response.choices[0].message.content or "").strip()
+        logger.info(f"Resposta bruta da IA para agrupamento: {result}")
+        match = re.search(r"\[.*\]", result, re.DOTALL)
+        if match:
+            result_json_str = match.group(0)
+        else:
+            result_json_str = result
         try:
-            response = client.chat.completions.create(
-                model="gpt-5.1",
-                messages=[{"role": "system", "content": "Você é especialista em infraestrutura pública."},
-                          {"role": "user", "content": prompt}],
-                max_completion_tokens=2048,
-                temperature=0.2,
-            )
-            result = response.choices[0].message.content.strip()
-            logger.info(f"Resposta bruta da IA para agrupamento: {result}")
-            match = re.search(r"\[.*\]", result, re.DOTALL)
-            if match:
-                result_json_str = match.group(0)
-            else:
-                result_json_str = result
-            try:
-                groups = json.loads(result_json_str)
-                all_groups.extend(groups)
-            except Exception as e:
-                logger.error(f"Erro ao fazer json.loads da resposta da IA: {e}\nConteúdo recebido: {result_json_str}")
-                continue
+            groups = json.loads(result_json_str)
         except Exception as e:
-            logger.error(f"Erro ao agrupar notícias por tema: {e}")
+            logger.error(f"Erro ao fazer json.loads da resposta da IA: {e}\nConteúdo recebido: {result_json_str}")
             continue
+        # Descarta ids que não pertencem ao prompt e evita a mesma notícia em dois grupos
+        batch_ids = {n['id'] for cluster in batch for n in cluster}
+        for group in groups:
+            if not isinstance(group, dict):
+                continue
+            ids = [i for i in group.get('ids', []) if i in batch_ids]
+            batch_ids -= set(ids)
+            if ids:
+                all_groups.append({'tema': group.get('tema'), 'ids': ids})
+        if batch_ids:
+            logger.info(f"{len(batch_ids)} notícias não foram agrupadas pela IA e ficam para a próxima execução.")
     return all_groups
 
+
+def _parse_summary_response(response):
+    if isinstance(response, Exception):
+        return f"Erro IA: {response}", f"Erro IA: {response}"
+    result = (response.choices[0].message.content or "").strip()
+    regex = r"HEADLINE \| (.*)\s+RESUMO \| (.*)"
+    match = re.search(regex, result, re.DOTALL)
+    if match:
+        return match.group(1).strip(), match.group(2).strip()
+    return result[:120], result
+
+
 def process_and_save_relevant_news():
     """
     Busca notícias relevantes não agrupadas, agrupa, gera headline/resumo e salva na tabela relevant_news.
+    Os headlines/resumos de todos os grupos são gerados em paralelo pelo llm_executor.
     Atualiza status das notícias para evitar retrabalho.
     """
     # Buscar notícias relevantes e não agrupadas
@@ -68,44 +128,38 @@ def process_and_save_relevant_news():
         logger.info("Nenhuma notícia relevante para agrupar.")
         return
     groups = group_news_by_theme(news_list)
+    prepared = []
+    requests = []
     for group in groups:
         ids = group.get('ids', [])
         tema = group.get('tema', 'Tema não identificado')
         # Coleta dados individuais das notícias do grupo
         news_in_group = [n for n in news_list if n['id'] in ids]
-        headlines = [n['title'] for n in news_in_group]
-        summaries = [n['raw_content'][:500] for n in news_in_group]
-        # Prompt para o grupo
-        prompt = (
-            f"Gere um headline (máx 120 caracteres) e um resumo (máx 250 tokens) para o grupo de notícias sobre '{tema}'.\n"
-            "Responda EXATAMENTE neste formato, cada item em uma linha separada, sem texto extra:\n"
-            "HEADLINE | <headline aqui>\n"
-            "RESUMO | <resumo aqui>\n"
-            "Não inclua explicações, apenas o texto no formato acima.\n"
-            "Notícias:\n" + '\n'.join(headlines) + '\n' + '\n'.join(summaries)
+        # Orçamento de conteúdo por notícia: grupos grandes dividem o orçamento total do prompt
+        budget = max(SUMMARY_MIN_CONTENT_TOKENS, min(env.SUMMARY_CONTENT_TOKENS, env.SUMMARY_PROMPT_TOKENS // max(1, len(news_in_group))))
+        content = f"Tema: {tema}\nNotícias:\n" + "\n".join(
+            f"- {n['title']}\n{condense(n['raw_content'], budget, 'headline/resumo')}" for n in news_in_group
         )
-        headline = ""
-        ai_summary = ""
-        try:
-            response = client.chat.completions.create(
-                model="gpt-5.1",
-                messages=[{"role": "system", "content": "Você é especialista em infraestrutura pública."},
-                          {"role": "user", "content": prompt}],
-                max_completion_tokens=300,
-                temperature=0.5,
-            )
-            result = response.choices[0].message.content.strip()
-            regex = r"HEADLINE \| (.*)\s+RESUMO \| (.*)"
-            match = re.search(regex, result, re.DOTALL)
-            if match:
-                headline = match.group(1).strip()
-                ai_summary = match.group(2).strip()
-            else:
-                headline = result[:120]
-                ai_summary = result
-        except Exception as e:
-            headline = f"Erro IA: {e}"
-            ai_summary = f"Erro IA: {e}"
+        prepared.append((tema, news_in_group, llm_cache.make_cache_key(MODEL, SUMMARY_PROMPT_VERSION, SUMMARY_INSTRUCTIONS, content)))
+        requests.append({
+            'model': MODEL,
+            'messages': build_messages(SUMMARY_INSTRUCTIONS, content),
+            'max_completion_tokens': 300,
+            'temperature': 0.5,
+        })
+
+    # Só envia ao modelo os grupos sem headline/resumo em cache
+    cached = llm_cache.lookup([key for _, _, key in prepared], "headline/resumo")
+    pending = [i for i, (_, _, key) in enumerate(prepared) if key not in cached]
+    responses = dict(zip(pending, llm_executor.run([requests[i] for i in pending])))
+    new_entries = {}
+    for i, (tema, news_in_group, key) in enumerate(prepared):
+        if key in cached:
+            headline, ai_summary = cached[key]['headline'], cached[key]['ai_summary']
+        else:
+            headline, ai_summary = _parse_summary_response(responses[i])
+            if not isinstance(responses[i], Exception):
+                new_entries[key] = {'headline': headline, 'ai_summary': ai_summary}
         for n in news_in_group:
             insert_relevant_news({
                 'original_ids': [n['id']],
@@ -119,3 +173,4 @@ def process_and_save_relevant_news():
                 'status': 'pending'
             })
         logger.info(f"Grupo '{tema}' salvo em relevant_news com {len(news_in_group)} notícias.")
+    llm_cache.store(new_entries)
@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from html import escape
+
+
+HTML_HEADER = "<h2>Resumo das Notícias</h2>"
+TEXT_HEADER = "RESUMO DAS NOTÍCIAS\n===================\n"
+
+TOPIC_HTML = "<h3>{headline}</h3><p><b>Resumo:</b> {summary}</p><ul>{items}</ul><br>"
+ITEM_HTML = (
+    "<li style='font-size: 14px; font-weight: normal; color: #555;'>"
+    "<a href=\"{url}\" style='color: #1a73e8; text-decoration: none; font-size: 14px;'>{title}</a> "
+    "(Fonte: <span style='font-size: 12px; color: #777;'>{source} - {date}</span>)"
+    "</li>"
+)
+
+TOPIC_TEXT = "\n{headline}\n\nResumo: {summary}\n\n{items}\n"
+ITEM_TEXT = "- {title} ({source} - {date})\n  {url}"
+
+
+def _format_date(value):
+    """
+    Formata a data de publicação como dd/mm/aaaa (aceita datetime ou texto ISO).
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value.strftime('%d/%m/%Y') if hasattr(value, 'strftime') else value
+
+
+def _group_by_topic(news):
+    """
+    Agrupa as notícias por tema, na ordem em que os temas aparecem.
+    """
+    topics = {}
+    for n in news:
+        topics.setdefault(n.get('topic', 'Sem tema'), []).append(n)
+    return topics
+
+
+class NewsletterRenderer:
+    """
+    Renderiza a newsletter (HTML e texto puro) a partir de modelos fixos montados com join, com os
+    valores escapados. Cada bloco de tema fica em um cache LRU em memória, indexado pelos ids das
+    notícias do bloco: reenvios, prévias e destinatários com pendências diferentes reaproveitam
+    os blocos já renderizados.
+    """
+
+    def __init__(self, max_blocks=8192):
+        self.max_blocks = max_blocks
+        self.hits = 0
+        self.misses = 0
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _render_block(self, topic, group):
+        first = group[0]
+        headline = first.get('headline') or f"Tema {topic}"
+        summary = first.get('ai_summary') or ''
+        items = [
+            {
+                'url': n.get('original_url') or '',
+                'title': n.get('original_title') or '',
+                'source': n.get('source') or '',
+                'date': _format_date(n['published_at']) if n.get('published_at') else '',
+            }
+            for n in group
+        ]
+        html = TOPIC_HTML.format(
+            headline=escape(str(headline)),
+            summary=escape(str(summary)),
+            items="".join(ITEM_HTML.format_map({key: escape(str(value)) for key, value in item.items()}) for item in items),
+        )
+        text = TOPIC_TEXT.format(
+            headline=headline,
+            summary=summary,
+            items="\n".join(ITEM_TEXT.format_map(item) for item in items),
+        )
+        return html, text
+
+    def _block(self, topic, group):
+        key = tuple(n['id'] for n in group)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                self.hits += 1
+                return block
+            self.misses += 1
+        block = self._render_block(topic, group)
+        with self._lock:
+            self._blocks[key] = block
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        return block
+
+    def render(self, news):
+        """
+        Retorna (html, texto) da newsletter com as notícias informadas (dicts de relevant_news).
+        """
+        blocks = [self._block(topic, group) for topic, group in _group_by_topic(news).items()]
+        html = HTML_HEADER + "".join(block[0] for block in blocks)
+        text = TEXT_HEADER + "".join(block[1] for block in blocks)
+        return html, text
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+newsletter_renderer = NewsletterRenderer()
@@ -0,0 +1,235 @@
+import queue
+import threading
+import time
+
+from app.config.database import unit_of_work
+from app.config.environments import env
+from app.config.logs import logger
+from app.config.metrics import metrics
+from app.database.llm_cache import evict_llm_cache
+from app.database.raw_news import insert_raw_news_bulk
+from app.services.browser_pool import browser_pool
+from app.services.html_cache import html_cache
+from app.services.news_classifier import classify_and_update, classify_and_update_all
+from app.services.news_crawler import extract_content_limited, iter_new_news
+from app.services.search_watermarks import WatermarkTracker
+
+
+_END = object()
+
+
+class StageStats:
+    """
+    Estatísticas de uma etapa: itens recebidos/emitidos, erros, tempo trabalhando
+    e tempo bloqueado esperando espaço na fila seguinte (backpressure).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def add(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def record_metrics(self):
+        elapsed = (self.finished_at or time.monotonic()) - (self.started_at or time.monotonic())
+        for name, value in (
+            ("items_in", self.items_in), ("items_out", self.items_out), ("errors", self.errors),
+            ("elapsed_seconds", elapsed), ("busy_seconds", self.busy_seconds), ("blocked_seconds", self.blocked_seconds),
+        ):
+            metrics.set(f"pipeline_stage_{name}", value, "Estatísticas das etapas do pipeline em streaming", stage=self.name)
+
+    def summary(self):
+        elapsed = (self.finished_at or time.monotonic()) - (self.started_at or time.monotonic())
+        return (
+            f"{self.name}: {self.items_in} recebidos, {self.items_out} emitidos, {self.errors} erros | "
+            f"{elapsed:.1f}s total, {self.busy_seconds:.1f}s trabalhando, {self.blocked_seconds:.1f}s bloqueado"
+        )
+
+
+class Stage:
+    """
+    Etapa do pipeline em streaming. Consome itens da fila de entrada com `workers` threads,
+    em lotes de até `batch_size` itens (ou o que houver após `flush_seconds`), e publica na
+    fila de saída o que o `handler(lote)` retornar. Filas limitadas geram backpressure.
+    """
+
+    def __init__(self, name, handler, inbox, outbox=None, workers=1, batch_size=1, flush_seconds=2.0):
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.stats = StageStats(name)
+        self._running = self.workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _emit(self, items):
+        for item in items or []:
+            self.stats.add(items_out=1)
+            if self.outbox is not None:
+                started = time.monotonic()
+                self.outbox.put(item)
+                self.stats.add(blocked_seconds=time.monotonic() - started)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        started = time.monotonic()
+        try:
+            outputs = list(self.handler(batch) or [])
+        except Exception as e:
+            logger.error(f"Erro na etapa '{self.name}' ({len(batch)} itens): {e}")
+            self.stats.add(errors=len(batch))
+            outputs = []
+        self.stats.add(busy_seconds=time.monotonic() - started)
+        self._emit(outputs)
+
+    def _work(self):
+        # Cada thread da etapa usa uma única conexão do pool durante toda a etapa
+        with unit_of_work(), metrics.profiled(self.name):
+            self._consume()
+
+    def _consume(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self.inbox.get(timeout=timeout)
+            except queue.Empty:
+                self._flush(batch)
+                batch = []
+                continue
+            if item is _END:
+                # Devolve o marcador para que as demais threads da etapa também encerrem
+                self.inbox.put(_END)
+                break
+            self.stats.add(items_in=1)
+            batch.append(item)
+            if len(batch) == 1:
+                deadline = time.monotonic() + self.flush_seconds
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        self._flush(batch)
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if last:
+            self.stats.finished_at = time.monotonic()
+            if self.outbox is not None:
+                self.outbox.put(_END)
+
+    def start(self):
+        self.stats.started_at = time.monotonic()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+
+def _produce(source, outbox, stats):
+    stats.started_at = time.monotonic()
+    try:
+        with unit_of_work(), metrics.profiled(stats.name):
+            for item in source():
+                stats.add(items_out=1)
+                started = time.monotonic()
+                outbox.put(item)
+                stats.add(blocked_seconds=time.monotonic() - started)
+    except Exception as e:
+        logger.error(f"Erro na etapa '{stats.name}': {e}")
+        stats.add(errors=1)
+    finally:
+        stats.finished_at = time.monotonic()
+        stats.busy_seconds = stats.finished_at - stats.started_at - stats.blocked_seconds
+        outbox.put(_END)
+
+
+def _extract(batch):
+    for news in batch:
+        if not news['raw_content']:
+            news['raw_content'] = extract_content_limited(news['url'])
+    return batch
+
+
+def _insert(batch, watermarks=None):
+    inserted = []
+    for report in insert_raw_news_bulk(batch):
+        if watermarks:
+            # Só avança as marcas d'água com o que foi gravado em raw_news
+            stored = set(report['inserted'] + report['duplicated'])
+            watermarks.confirm([news for news in batch if news['url'] in stored])
+        for news in batch:
+            news_id = report['ids'].get(news['url'])
+            if news_id is not None and news['raw_content']:
+                inserted.append({'id': news_id, 'raw_content': news['raw_content'], 'url': news['url'], 'duplicate_of': None})
+    return inserted
+
+
+def _classify(batch):
+    classify_and_update(batch)
+    return batch
+
+
+def run_sync_pipeline():
+    """
+    Executa busca, extração, inserção e classificação como etapas em streaming ligadas por filas limitadas.
+    Cada notícia é gravada assim que extraída e classificada assim que gravada.
+    As marcas d'água da busca só avançam depois que todas as etapas terminaram.
+    Ao final classifica também as pendências de execuções anteriores e loga as estatísticas por etapa.
+    """
+    queue_size = env.PIPELINE_QUEUE_SIZE
+    to_extract = queue.Queue(maxsize=queue_size)
+    to_insert = queue.Queue(maxsize=queue_size)
+    to_classify = queue.Queue(maxsize=queue_size)
+
+    watermarks = WatermarkTracker()
+    search_stats = StageStats("busca")
+    stages = [
+        Stage("extração", _extract, to_extract, to_insert, workers=env.EXTRACTION_MAX_WORKERS),
+        Stage("inserção", lambda batch: _insert(batch, watermarks), to_insert, to_classify, batch_size=env.DB_BULK_CHUNK_SIZE),
+        Stage("classificação", _classify, to_classify, batch_size=env.CLASSIFY_FLUSH_SIZE),
+    ]
+
+    with unit_of_work():
+        evict_llm_cache()
+    for stage in stages:
+        stage.start()
+    producer = threading.Thread(target=_produce, args=(lambda: iter_new_news(watermarks), to_extract, search_stats), name="busca", daemon=True)
+    producer.start()
+    try:
+        producer.join()
+        for stage in stages:
+            stage.join()
+        watermarks.save()
+    finally:
+        browser_pool.close_all()
+        if env.HTML_CACHE_ENABLED:
+            html_cache.evict()
+
+    logger.info("Estatísticas do pipeline em streaming:")
+    for stats in [search_stats] + [stage.stats for stage in stages]:
+        logger.info(f"- {stats.summary()}")
+        stats.record_metrics()
+
+    # Notícias que ficaram sem classificação em execuções anteriores
+    with unit_of_work():
+        classify_and_update_all()
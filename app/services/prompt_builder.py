@@ -0,0 +1,209 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+from app.config.logs import logger
+from app.config.metrics import metrics
+
+
+SYSTEM_PROMPT = "Você é especialista em infraestrutura pública."
+
+# Codificação dos modelos GPT-4o/GPT-5 no tiktoken
+TOKEN_ENCODING = "o200k_base"
+
+# Fração do orçamento reservada aos parágrafos iniciais (lide); o restante vai para as frases-chave
+LEAD_SHARE = 0.6
+SKIPPED_MARKER = " [...] "
+
+# Início de parágrafos de navegação, banners e rodapés que sobram na extração. Só vale no começo do
+# parágrafo: no meio do texto essas palavras costumam ser parte da notícia (ex.: licitação de publicidade)
+BOILERPLATE_PATTERNS = re.compile(
+    r"(?:(?:este site |o site |nos )?(?:usa|usamos|utiliza|utilizamos) cookies|aceitar (?:e fechar|cookies|todos)|"
+    r"politica de privacidade|termos de uso|"
+    r"assine|seja assinante|ja e assinante|cadastre-se|receba (?:a nossa |nossa |as )?(?:newsletter|noticias)|faca login|"
+    r"leia (?:tambem|mais)|veja (?:tambem|mais)|saiba mais|mais lidas|(?:noticias|materias) relacionadas|"
+    r"compartilhe|compartilhar|siga[- ]nos|entre (?:no|em nosso) (?:canal|grupo)|"
+    r"publicidade$|anuncio$|anuncio patrocinado|continua (?:apos|depois)|"
+    r"todos os direitos reservados|copyright|clique aqui|reproducao (?:proibida|autorizada))\b|©"
+)
+# Parágrafos longos que começam com esses padrões são mantidos (ex.: "Leia mais" seguido do texto)
+BOILERPLATE_MAX_WORDS = 40
+# Linhas curtas sem números nem pontuação de frase são itens de menu
+MIN_PARAGRAPH_WORDS = 5
+
+# Palavras que indicam frases com informação do projeto (valor, prazo, leilão etc.)
+KEY_TERMS = {
+    "concessao", "concessoes", "ppp", "ppps", "parceria", "leilao", "licitacao", "edital", "contrato",
+    "consorcio", "outorga", "tarifa", "investimento", "investimentos", "privatizacao", "desestatizacao",
+    "bndes", "tcu", "aneel", "antt", "anac", "antaq", "rodovia", "ferrovia", "aeroporto", "porto",
+    "saneamento", "iluminacao", "hospital", "energia", "lote", "vencedor", "proposta", "aporte",
+}
+AMOUNT_PATTERN = re.compile(r"r\$|\bbilh|\bmilh|\d+(?:[.,]\d+)?\s*%|\b\d{4}\b")
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """
+    Tokenizador local (tiktoken), importado no primeiro uso. Sem ele a contagem é aproximada.
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        logger.warning(f"tiktoken indisponível ({e}); tokens estimados por caracteres.")
+        return None
+
+
+def count_tokens(text):
+    encoding = _encoding()
+    if encoding is None:
+        # Aproximação de ~4 caracteres por token
+        return len(text or "") // 4 + 1
+    return len(encoding.encode(text or "", disallowed_special=()))
+
+
+def truncate_tokens(text, budget):
+    """
+    Corta o texto em `budget` tokens, no limite da última palavra inteira.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        cut = text[:max(0, budget) * 4]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= budget:
+            return text
+        cut = encoding.decode(tokens[:max(0, budget)])
+    if len(cut) < len(text) and " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut
+
+
+def strip_boilerplate(text):
+    """
+    Divide o texto extraído em parágrafos e remove menus, banners de cookies, chamadas de
+    "leia também", botões de compartilhamento, rodapés e parágrafos repetidos.
+    """
+    paragraphs = []
+    seen = set()
+    for paragraph in re.split(r"\n\s*\n|\n", text or ""):
+        paragraph = " ".join(paragraph.split())
+        words = len(paragraph.split())
+        if words < MIN_PARAGRAPH_WORDS and not re.search(r"[\d.!?:]", paragraph):
+            continue
+        normalized = _normalize(paragraph)
+        if words <= BOILERPLATE_MAX_WORDS and BOILERPLATE_PATTERNS.match(normalized):
+            continue
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+        paragraphs.append(paragraph)
+    return paragraphs
+
+
+def lead(text, max_chars):
+    """
+    Início do texto (sem boilerplate) com até `max_chars` caracteres, para usos locais sem contagem de tokens.
+    """
+    return " ".join(strip_boilerplate(text))[:max_chars]
+
+
+def _sentences(paragraph):
+    return [sentence for sentence in re.split(r"(?<=[.!?])\s+", paragraph) if sentence]
+
+
+def _sentence_score(sentence, position):
+    normalized = _normalize(sentence)
+    score = 2.0 * len(set(re.findall(r"\w+", normalized)) & KEY_TERMS)
+    if AMOUNT_PATTERN.search(normalized):
+        score += 1.5
+    # Em notícias o que vem antes costuma ser mais importante
+    return score + 1.0 / (1 + position)
+
+
+def condense(text, budget, site="geral"):
+    """
+    Reduz o conteúdo de uma notícia a até `budget` tokens para o prompt: remove o boilerplate,
+    mantém os parágrafos iniciais (lide) e completa com as frases do restante que mais falam
+    do projeto (termos de concessões/PPPs, valores, datas), na ordem original.
+    Se nada sobrar depois da limpeza, envia o início do texto original cortado no orçamento.
+    `site` identifica o ponto de chamada nas métricas de tokens originais x enviados.
+    """
+    paragraphs = strip_boilerplate(text)
+    original_tokens = count_tokens(text)
+    if not paragraphs:
+        content = truncate_tokens((text or "").strip(), budget)
+        _record(site, original_tokens, count_tokens(content))
+        return content
+    content = "\n".join(paragraphs)
+    content_tokens = count_tokens(content)
+    if content_tokens <= budget:
+        _record(site, original_tokens, content_tokens)
+        return content
+
+    lead_budget = int(budget * LEAD_SHARE)
+    kept = []
+    used = 0
+    rest = []
+    for index, paragraph in enumerate(paragraphs):
+        tokens = count_tokens(paragraph)
+        if used + tokens <= lead_budget:
+            kept.append(paragraph)
+            used += tokens
+            continue
+        rest = paragraphs[index:]
+        if not kept:
+            # Primeiro parágrafo maior que o lide (ex.: texto extraído sem quebras): entra frase a frase
+            sentences = _sentences(paragraph)
+            taken = 0
+            for sentence in sentences:
+                tokens = count_tokens(sentence) + 1
+                if used + tokens > lead_budget:
+                    break
+                used += tokens
+                taken += 1
+            if taken:
+                kept.append(" ".join(sentences[:taken]))
+            else:
+                kept.append(truncate_tokens(sentences[0], lead_budget))
+                used = count_tokens(kept[0])
+                taken = 1
+            rest = [" ".join(sentences[taken:])] + paragraphs[index + 1:]
+        break
+
+    sentences = [sentence for p in rest for sentence in _sentences(p) if len(sentence.split()) >= MIN_PARAGRAPH_WORDS]
+    ranked = sorted(range(len(sentences)), key=lambda i: _sentence_score(sentences[i], i), reverse=True)
+    chosen = []
+    remaining = budget - used - count_tokens(SKIPPED_MARKER)
+    for i in ranked:
+        tokens = count_tokens(sentences[i]) + 1
+        if tokens <= remaining:
+            chosen.append(i)
+            remaining -= tokens
+    result = "\n".join(kept)
+    if chosen:
+        result += SKIPPED_MARKER + " ".join(sentences[i] for i in sorted(chosen))
+    _record(site, original_tokens, count_tokens(result))
+    return result
+
+
+def _record(site, original_tokens, sent_tokens):
+    metrics.inc("prompt_content_tokens", original_tokens, "Tokens do conteúdo das notícias antes e depois do corte", site=site, kind="original")
+    metrics.inc("prompt_content_tokens", sent_tokens, site=site, kind="sent")
+
+
+def build_messages(instructions, content):
+    """
+    Mensagens do chat com a parte fixa primeiro (system + instruções) e o conteúdo variável no final,
+    para que o prefixo seja igual entre chamadas e aproveite o cache de prompt do provedor.
+    """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": instructions + content},
+    ]
@@ -0,0 +1,159 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+
+from app.config.environments import env
+from app.config.logs import logger
+from app.config.metrics import metrics
+from app.database.filters import get_filters
+from app.database.raw_news import get_labeled_news
+from app.services.news_clustering import hashed_term_counts
+
+
+N_FEATURES = 2 ** 16
+TRAINING_EPOCHS = 300
+LEARNING_RATE = 0.5
+L2_PENALTY = 1e-4
+PREFILTER_CONTEXT = "Descartada pelo pré-filtro local"
+
+
+def _normalize(content):
+    content = unicodedata.normalize("NFKD", (content or "").lower())
+    return "".join(c for c in content if not unicodedata.combining(c))
+
+
+class Lexicon:
+    """
+    Léxico ponderado montado a partir dos termos ativos da tabela filters.
+    O termo completo encontrado vale 1; termos parcialmente encontrados valem metade da fração de palavras presentes.
+    """
+
+    def __init__(self, terms):
+        self.terms = []
+        for term in terms or []:
+            phrase = _normalize(term).strip()
+            words = {w for w in re.findall(r"\w+", phrase) if len(w) > 2}
+            if phrase:
+                self.terms.append((phrase, words))
+
+    def score(self, content):
+        content = _normalize(content)
+        words = set(re.findall(r"\w+", content))
+        best = 0.0
+        for phrase, term_words in self.terms:
+            if phrase in content:
+                return 1.0
+            if term_words:
+                best = max(best, 0.5 * len(term_words & words) / len(term_words))
+        return best
+
+
+def _features(contents, lexicon):
+    counts = hashed_term_counts(contents, N_FEATURES)
+    counts.data = np.log1p(counts.data)
+    norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    lexicon_scores = np.array([[lexicon.score(c)] for c in contents])
+    return sparse.hstack([sparse.diags(1 / norms) @ counts, sparse.csr_matrix(lexicon_scores)]).tocsr()
+
+
+def _sigmoid(z):
+    return 1 / (1 + np.exp(-np.clip(z, -30, 30)))
+
+
+class RelevancePrefilter:
+    """
+    Modelo linear (regressão logística) treinado com as notas já atribuídas pela IA em raw_news.
+    Sem dados suficientes para treino usa apenas o léxico dos filtros.
+    """
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+        self.weights = None
+        self.bias = 0.0
+
+    @property
+    def ready(self):
+        """
+        Só descarta notícias com o modelo treinado ou com termos no léxico; sem nenhum dos dois toda nota seria 0.
+        """
+        return self.weights is not None or bool(self.lexicon.terms)
+
+    def train(self, labeled_news):
+        contents = [n['raw_content'] for n in labeled_news]
+        labels = np.array([1.0 if n['relevance_score'] >= 7 else 0.0 for n in labeled_news])
+        positives = labels.sum()
+        if len(labels) < env.PREFILTER_MIN_TRAINING_SAMPLES or positives in (0, len(labels)):
+            logger.info(f"Pré-filtro: dados insuficientes para treino ({len(labels)} notícias rotuladas), usando apenas o léxico.")
+            return
+        X = _features(contents, self.lexicon)
+        # Pesos por classe: as relevantes costumam ser minoria
+        sample_weights = np.where(labels == 1, len(labels) / (2 * positives), len(labels) / (2 * (len(labels) - positives)))
+        weights = np.zeros(X.shape[1])
+        bias = 0.0
+        for _ in range(TRAINING_EPOCHS):
+            errors = (_sigmoid(X @ weights + bias) - labels) * sample_weights
+            weights -= LEARNING_RATE * (X.T @ errors / len(labels) + L2_PENALTY * weights)
+            bias -= LEARNING_RATE * errors.mean()
+        self.weights, self.bias = weights, bias
+        logger.info(f"Pré-filtro treinado com {len(labels)} notícias rotuladas ({int(positives)} relevantes).")
+
+    def scores(self, contents):
+        """
+        Retorna a probabilidade estimada de relevância de cada texto (0 a 1).
+        """
+        if not contents:
+            return np.array([])
+        if self.weights is None:
+            return np.array([self.lexicon.score(c) for c in contents])
+        return _sigmoid(_features(contents, self.lexicon) @ self.weights + self.bias)
+
+
+@lru_cache(maxsize=1)
+def load_prefilter():
+    """
+    Monta e treina o pré-filtro uma única vez por execução (reaproveitado entre os lotes do pipeline).
+    Levanta RuntimeError se os filtros não puderem ser lidos, para não guardar em cache um pré-filtro vazio.
+    """
+    filters = get_filters()
+    if filters is None:
+        raise RuntimeError("não foi possível buscar os filtros")
+    prefilter = RelevancePrefilter(Lexicon(filters))
+    prefilter.train(get_labeled_news(env.PREFILTER_MAX_TRAINING_SAMPLES))
+    return prefilter
+
+
+def prefilter_news(news_list):
+    """
+    Pontua localmente as notícias e separa as claramente irrelevantes antes da IA.
+    Retorna (notícias para a IA, resultados de descarte no formato {'id', 'relevance', 'context'}).
+    """
+    if not env.PREFILTER_ENABLED or not news_list:
+        return news_list, []
+    try:
+        prefilter = load_prefilter()
+    except RuntimeError as e:
+        logger.warning(f"Pré-filtro desativado neste lote ({e}); todas as notícias vão para a IA.")
+        return news_list, []
+    if not prefilter.ready:
+        logger.info("Pré-filtro sem filtros ativos e sem dados de treino; todas as notícias vão para a IA.")
+        return news_list, []
+    scores = prefilter.scores([n['raw_content'] for n in news_list])
+
+    to_classify = []
+    rejected = []
+    for news, score in zip(news_list, scores):
+        if score < env.PREFILTER_REJECT_THRESHOLD:
+            rejected.append({'id': news['id'], 'relevance': None, 'context': f"{PREFILTER_CONTEXT} (score {score:.3f})"})
+        else:
+            to_classify.append(news)
+    metrics.inc("prefilter_news", len(news_list), "Notícias avaliadas pelo pré-filtro local", result="evaluated")
+    metrics.inc("prefilter_news", len(rejected), result="rejected")
+    logger.info(
+        f"Pré-filtro: {len(news_list)} avaliadas, {len(rejected)} descartadas sem chamar a IA "
+        f"({len(rejected) / len(news_list):.0%} das notícias), {len(to_classify)} enviadas para a IA."
+    )
+    return to_classify, rejected
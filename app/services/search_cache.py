@@ -0,0 +1,76 @@
+import hashlib
+import json
+import threading
+import time
+
+from app.config.environments import env
+from app.config.logs import logger
+from app.config.metrics import metrics
+from app.database.search_cache import get_cached_search, save_cached_search
+
+
+# Parâmetros que não mudam o resultado da busca
+IGNORED_PARAMS = {"api_key"}
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def make_cache_key(params, now=None):
+    """
+    Chave do cache: motor + parâmetros normalizados (sem a chave de API) + janela de tempo de duração do TTL.
+    """
+    normalized = {
+        key: value.strip().lower() if isinstance(value, str) else value
+        for key, value in params.items()
+        if key not in IGNORED_PARAMS
+    }
+    bucket = int((now or time.time()) // (env.SEARCH_CACHE_TTL_HOURS * 3600))
+    raw = json.dumps([params.get("engine"), normalized, bucket], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _count(engine, hit):
+    with _stats_lock:
+        stats = _stats.setdefault(engine, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+    metrics.inc("search_cache_lookups", description="Consultas ao cache de buscas (miss = chamada paga à SerpApi)", engine=engine, result="hit" if hit else "miss")
+
+
+def cached_search(params, search):
+    """
+    Executa `search(params)` consultando antes o cache de respostas.
+    Só respostas sem erro são gravadas.
+    """
+    if not env.SEARCH_CACHE_ENABLED:
+        return search(params)
+    engine = params.get("engine")
+    cache_key = make_cache_key(params)
+    cached = get_cached_search(cache_key)
+    if cached is not None:
+        _count(engine, hit=True)
+        return cached
+    _count(engine, hit=False)
+    results = search(params)
+    if not results.get("error"):
+        save_cached_search(cache_key, engine, results)
+    return results
+
+
+def search_cache_stats():
+    """
+    Retorna acertos, erros e taxa de acerto do cache por motor de busca.
+    """
+    with _stats_lock:
+        return {
+            engine: {**stats, "hit_rate": stats["hits"] / max(1, stats["hits"] + stats["misses"])}
+            for engine, stats in _stats.items()
+        }
+
+
+def log_search_cache_stats():
+    for engine, stats in search_cache_stats().items():
+        logger.info(
+            f"Cache de buscas ({engine}): {stats['hits']} acertos, {stats['misses']} consultas pagas "
+            f"(taxa de acerto {stats['hit_rate']:.0%})."
+        )
@@ -0,0 +1,65 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app.config.environments import env
+from app.config.logs import logger
+from app.config.metrics import metrics
+from app.services.rate_limiter import RateLimiter
+
+
+class SearchSource:
+    """
+    Fonte de busca agendável: uma função `fetch(term, api_key, raise_errors=True, watermark=None)`
+    com seu próprio limitador de taxa.
+    """
+
+    def __init__(self, engine, fetch, api_key, rate_per_second):
+        self.engine = engine
+        self.fetch = fetch
+        self.api_key = api_key
+        self.limiter = RateLimiter(rate_per_second)
+
+
+def _search_with_retries(source, term, max_retries, backoff, watermark=None):
+    for attempt in range(max_retries + 1):
+        source.limiter.acquire()
+        try:
+            with metrics.timer("search_request_seconds", "Duração das buscas por motor (inclui paginação)", engine=source.engine):
+                news = source.fetch(term, source.api_key, raise_errors=True, watermark=watermark)
+            metrics.inc("search_requests", description="Buscas por motor e resultado", engine=source.engine, result="ok")
+            metrics.inc("search_articles", len(news), "Notícias retornadas pelas buscas por motor", engine=source.engine)
+            return news
+        except Exception as e:
+            if attempt >= max_retries:
+                metrics.inc("search_requests", engine=source.engine, result="error")
+                logger.error(f"Busca falhou após {attempt + 1} tentativas ({source.engine} | termo: {term}): {e}")
+                return []
+            metrics.inc("search_requests", engine=source.engine, result="retry")
+            delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+            logger.warning(f"Erro na busca ({source.engine} | termo: {term}), nova tentativa em {delay:.1f}s: {e}")
+            time.sleep(delay)
+
+
+def fan_out_search(terms, sources, max_workers=None, max_retries=None, backoff=None, watermarks=None):
+    """
+    Executa as buscas de todos os termos em todas as fontes em paralelo.
+    Gera tuplas (term, engine, news) à medida que cada busca termina.
+    Com `watermarks` (WatermarkTracker) cada busca para ao alcançar o que já foi visto.
+    """
+    max_workers = max(1, max_workers or env.SEARCH_MAX_WORKERS)
+    max_retries = env.SEARCH_MAX_RETRIES if max_retries is None else max_retries
+    backoff = env.SEARCH_BACKOFF_SECONDS if backoff is None else backoff
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search") as executor:
+        futures = {
+            executor.submit(
+                _search_with_retries, source, term, max_retries, backoff,
+                watermarks.get(term, source.engine) if watermarks else None,
+            ): (term, source.engine)
+            for term in terms
+            for source in sources
+        }
+        for future in as_completed(futures):
+            term, engine = futures[future]
+            yield term, engine, future.result()
@@ -0,0 +1,129 @@
+import threading
+from datetime import timedelta
+
+from app.config.environments import env
+from app.config.logs import logger
+from app.database.search_watermarks import get_watermarks, save_watermarks
+from app.services.url_canonicalizer import canonicalize_url
+
+
+# Limite de URLs de fronteira guardadas por (termo, motor)
+MAX_BOUNDARY_URLS = 500
+
+# Motores que retornam só a data de publicação (sem hora): a sobreposição cobre pelo menos o dia anterior
+DATE_ONLY_ENGINES = {'google_news', 'alerta_licitacao'}
+DATE_ONLY_MIN_OVERLAP = timedelta(hours=24)
+
+
+def _canonical(news):
+    return news.get('canonical_url') or canonicalize_url(news.get('url'))
+
+
+class Watermark:
+    """
+    Fronteira do que já foi visto para um (termo, motor). Notícias publicadas antes de
+    `newest_published_at - overlap` já foram processadas; dentro da janela de sobreposição
+    só as URLs de fronteira contam como vistas. Notícias sem data nunca são descartadas.
+    """
+
+    def __init__(self, newest_published_at, boundary_urls, overlap):
+        self.newest_published_at = newest_published_at
+        self.boundary_urls = set(boundary_urls)
+        self.cutoff = newest_published_at - overlap
+        self.skipped = 0
+
+    def is_seen(self, news):
+        published_at = news.get('published_at')
+        if published_at is None:
+            return False
+        if published_at < self.cutoff:
+            return True
+        return _canonical(news) in self.boundary_urls
+
+    def cut(self, news_list):
+        """
+        Remove as notícias já vistas. Retorna (notícias novas, se a fronteira foi alcançada).
+        """
+        fresh = [n for n in news_list if not self.is_seen(n)]
+        self.skipped += len(news_list) - len(fresh)
+        return fresh, len(fresh) < len(news_list)
+
+
+class WatermarkTracker:
+    """
+    Marcas d'água da busca incremental por (termo, motor) em uma execução.
+    `load` carrega as marcas gravadas, `observe` registra as notícias novas de cada busca,
+    `confirm` marca as que foram gravadas em raw_news (ou já existiam) e `save` avança as marcas
+    só com as confirmadas. A marca também não passa da notícia não confirmada mais antiga (falha na
+    inserção): ela continua dentro da janela de sobreposição e volta na próxima execução.
+    """
+
+    def __init__(self, overlap_hours=None):
+        overlap_hours = env.SEARCH_WATERMARK_OVERLAP_HOURS if overlap_hours is None else overlap_hours
+        self.overlap = timedelta(hours=overlap_hours)
+        self._watermarks = {}
+        self._observed = {}
+        self._confirmed = set()
+        self._lock = threading.Lock()
+
+    def _overlap(self, engine):
+        if engine in DATE_ONLY_ENGINES:
+            return max(self.overlap, DATE_ONLY_MIN_OVERLAP)
+        return self.overlap
+
+    def load(self, terms):
+        if not env.SEARCH_WATERMARKS_ENABLED:
+            return
+        for key, row in get_watermarks(terms).items():
+            self._watermarks[key] = Watermark(row['newest_published_at'], row['boundary_urls'], self._overlap(key[1]))
+
+    def get(self, term, engine):
+        return self._watermarks.get((term, engine))
+
+    def observe(self, term, engine, news_list):
+        with self._lock:
+            observed = self._observed.setdefault((term, engine), {})
+            for news in news_list:
+                if news.get('published_at') is None or not news.get('url'):
+                    continue
+                url = _canonical(news)
+                observed[url] = max(news['published_at'], observed.get(url, news['published_at']))
+
+    def confirm(self, news_list):
+        """
+        Registra as notícias gravadas em raw_news ou já existentes na base.
+        """
+        with self._lock:
+            self._confirmed.update(_canonical(news) for news in news_list if news.get('url'))
+
+    def _entry(self, key, observed, pending):
+        previous = self._watermarks.get(key)
+        overlap = self._overlap(key[1])
+        newest = max(observed.values())
+        if previous is not None:
+            newest = max(newest, previous.newest_published_at)
+        if pending:
+            # Mantém a notícia não confirmada mais antiga depois do corte por data
+            newest = min(newest, min(pending) + overlap)
+        cutoff = newest - overlap
+        boundary = sorted((p, url) for url, p in observed.items() if p >= cutoff)
+        urls = [url for _, url in reversed(boundary)]
+        # A fronteira anterior continua válida enquanto ainda estiver dentro da janela
+        if previous is not None and previous.newest_published_at >= cutoff:
+            urls += sorted(previous.boundary_urls - set(urls))
+        term, engine = key
+        return {'term': term, 'engine': engine, 'newest_published_at': newest, 'boundary_urls': urls[:MAX_BOUNDARY_URLS]}
+
+    def save(self):
+        if not env.SEARCH_WATERMARKS_ENABLED:
+            return
+        with self._lock:
+            entries = []
+            for key, observed in self._observed.items():
+                confirmed = {url: published_at for url, published_at in observed.items() if url in self._confirmed}
+                pending = [published_at for url, published_at in observed.items() if url not in self._confirmed]
+                if confirmed:
+                    entries.append(self._entry(key, confirmed, pending))
+        save_watermarks(entries)
+        skipped = sum(w.skipped for w in self._watermarks.values())
+        logger.info(f"Marcas d'água: {len(entries)} atualizadas, {skipped} notícias já vistas descartadas nas buscas.")
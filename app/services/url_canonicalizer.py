@@ -0,0 +1,132 @@
+import base64
+import binascii
+import re
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+
+# Parâmetros de rastreamento/campanha que não mudam o conteúdo da página
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "yclid", "igshid", "dclid", "ocid", "cmpid", "xtor",
+    "mc_cid", "mc_eid", "ref", "ref_src", "spm", "_ga",
+    "amp", "amp_js_v", "amp_gsa", "usqp", "outputtype", "__twitter_impression",
+}
+TRACKING_PREFIXES = ("utm_", "at_", "pk_", "hsa_")
+
+# Prefixos de host das versões móvel/AMP dos portais
+HOST_PREFIXES = ("www.", "m.", "amp.", "mobile.")
+
+# Segundo nível dos domínios de código de país (com.br, gov.br, org.br, co.uk...): o domínio
+# registrável tem um rótulo a mais, e o prefixo só é removido se ele continuar inteiro
+SECOND_LEVEL_DOMAINS = {
+    "com", "net", "org", "gov", "edu", "mil", "jus", "leg", "mp", "art", "blog", "eco", "emp",
+    "ind", "inf", "jor", "tv", "radio", "rec", "coop", "co", "ac", "gob",
+}
+
+
+def _unwrap_google(parts, query):
+    # news.google.com/...?url=<destino> e google.com/url?q=<destino>
+    if parts.path in ("/url", "/articles/url") or parts.netloc.endswith("news.google.com"):
+        return query.get("url") or query.get("q")
+    return None
+
+
+def _unwrap_bing(parts, query):
+    # bing.com/news/apiclick.aspx?url=<destino> e bing.com/ck/a?u=a1<base64 do destino>
+    if parts.path.lower() == "/news/apiclick.aspx":
+        return query.get("url")
+    if parts.path == "/ck/a" and query.get("u", "").startswith("a1"):
+        encoded = query["u"][2:]
+        try:
+            return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+    return None
+
+
+def _unwrap_amp_cache(parts, query):
+    # <portal>.cdn.ampproject.org/c/s/<host>/<caminho>
+    match = re.match(r"^/(?:[a-z]+/)?(?:c/)?(s/)?(.+)$", parts.path)
+    if not match:
+        return None
+    scheme = "https" if match.group(1) else "http"
+    return f"{scheme}://{match.group(2)}" + (f"?{parts.query}" if parts.query else "")
+
+
+# Regras por fonte: sufixo do host -> função que extrai a URL de destino de um redirecionamento
+SOURCE_RULES = {
+    "google.com": _unwrap_google,
+    "google.com.br": _unwrap_google,
+    "bing.com": _unwrap_bing,
+    "cdn.ampproject.org": _unwrap_amp_cache,
+}
+
+
+def _unwrap(url):
+    for _ in range(3):
+        parts = urlsplit(url)
+        host = parts.netloc.lower().split(":")[0]
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        target = None
+        for suffix, rule in SOURCE_RULES.items():
+            if host == suffix or host.endswith("." + suffix):
+                target = rule(parts, query)
+                break
+        if not target:
+            return url
+        url = unquote(target) if target.startswith("http%3A") or target.startswith("https%3A") else target
+    return url
+
+
+def _registrable_labels(host):
+    labels = host.split(".")
+    if len(labels) >= 2 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_DOMAINS:
+        return 3
+    return 2
+
+
+def _normalize_host(host):
+    host = host.lower().split(":")[0].rstrip(".")
+    changed = True
+    while changed:
+        changed = False
+        for prefix in HOST_PREFIXES:
+            # Nunca reduz o host abaixo do domínio registrável (amp.com.br não vira com.br)
+            rest = host[len(prefix):]
+            if host.startswith(prefix) and len(rest.split(".")) >= _registrable_labels(rest):
+                host = rest
+                changed = True
+    return host
+
+
+def _normalize_path(path):
+    path = re.sub(r"/{2,}", "/", path or "/")
+    # Variantes AMP: /amp/..., .../amp, ....amp e ....amp.html
+    segments = [s for s in path.split("/") if s.lower() != "amp"]
+    path = "/".join(segments) or "/"
+    path = re.sub(r"\.amp(\.html?)?$", lambda m: m.group(1) or "", path, flags=re.IGNORECASE)
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return path or "/"
+
+
+def _normalize_query(query):
+    params = [
+        (key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    return urlencode(sorted(params))
+
+
+def canonicalize_url(url):
+    """
+    Gera a URL canônica de uma notícia para deduplicação entre fontes:
+    remove redirecionamentos (Google/Bing/cache AMP), parâmetros de rastreamento, variantes AMP
+    e móveis do host, barra final e fragmento. A URL original continua sendo usada para o download.
+    """
+    if not url:
+        return url
+    url = _unwrap(url.strip())
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return url
+    return urlunsplit(("https", _normalize_host(parts.netloc), _normalize_path(parts.path), _normalize_query(parts.query), ""))
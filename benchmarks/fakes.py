@@ -0,0 +1,347 @@
+"""
+Servidores locais que substituem os serviços externos no benchmark offline: SerpApi (Google/Bing News),
+API de chat da OpenAI (com latência e respostas 429 configuráveis), um conjunto de sites de notícias
+e um servidor SMTP que só recebe e descarta as mensagens. Usam apenas a biblioteca padrão e rodam
+em threads do próprio processo do benchmark.
+"""
+import hashlib
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# Frases dos termos de busca: as notícias relevantes contêm uma delas (e passam pelo pré-filtro)
+RELEVANT_PHRASES = [
+    "concessão rodoviária", "parceria público-privada", "leilão de saneamento", "ppp hospitalar",
+    "concessão de aeroportos", "ppp de iluminação pública", "concessão ferroviária", "leilão de energia",
+]
+RELEVANT_WORDS = ["edital", "consórcio", "investimento", "contrato", "outorga", "tarifa", "obras", "licitação", "governo", "estado"]
+OTHER_WORDS = ["futebol", "campeonato", "receita", "novela", "temperatura", "chuva", "show", "celebridade", "festival", "torcida"]
+FILLER_WORDS = ["segundo", "informou", "nesta", "semana", "ainda", "também", "sobre", "cidade", "anúncio", "prazo", "projeto", "região"]
+
+
+def _stable_int(value):
+    return int(hashlib.sha256(value.encode("utf-8")).hexdigest()[:8], 16)
+
+
+class _HttpFake:
+    """
+    Servidor HTTP em thread própria. `handle(handler)` é implementado por cada fake.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self, host="127.0.0.1", port=0):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake._dispatch(self)
+
+            def do_POST(self):
+                fake._dispatch(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _dispatch(self, handler):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        self.handle(handler)
+
+    def _reply(self, handler, status, body, content_type="application/json", headers=None):
+        payload = body.encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        handler.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class ArticleFarm:
+    """
+    Sites de notícias: cada site é um servidor em uma porta própria (e portanto um domínio próprio para o
+    limite de downloads por domínio). As páginas são geradas de forma determinística a partir do id da
+    notícia, com navegação, banner de cookies e rodapé em volta do texto. `generation` entra na URL para
+    que cada repetição do benchmark baixe páginas novas (cache de HTML frio).
+    """
+
+    def __init__(self, sites=8, latency=0.05, relevant_ratio=0.3, duplicate_ratio=0.1, projects=40, paragraphs=8):
+        self.relevant_ratio = relevant_ratio
+        self.duplicate_ratio = duplicate_ratio
+        self.projects = projects
+        self.paragraphs = paragraphs
+        self.generation = 0
+        self._sites = [_ArticleSite(self, latency) for _ in range(max(1, sites))]
+
+    def start(self):
+        for site in self._sites:
+            site.start()
+        return self
+
+    def stop(self):
+        for site in self._sites:
+            site.stop()
+
+    @property
+    def requests(self):
+        return sum(site.requests for site in self._sites)
+
+    def url(self, article_id):
+        site = self._sites[article_id % len(self._sites)]
+        return f"{site.base_url}/g{self.generation}/noticias/{article_id}"
+
+    def is_relevant(self, article_id):
+        return random.Random(article_id).random() < self.relevant_ratio
+
+    def title(self, article_id):
+        rng = random.Random(article_id)
+        if self.is_relevant(article_id):
+            project = article_id % self.projects
+            phrase = RELEVANT_PHRASES[project % len(RELEVANT_PHRASES)]
+            return f"Governo publica edital de {phrase} do lote {project} ({rng.choice(RELEVANT_WORDS)})"
+        return f"{rng.choice(OTHER_WORDS).capitalize()}: destaque da semana na cidade {article_id % 97}"
+
+    def body(self, article_id):
+        # Parte das notícias republica o texto de outra (mesma matéria em vários portais)
+        rng = random.Random(article_id)
+        source_id = article_id
+        if article_id > 10 and rng.random() < self.duplicate_ratio:
+            source_id = article_id - rng.randint(1, 10)
+        rng = random.Random(f"body-{source_id}")
+        relevant = self.is_relevant(source_id)
+        vocabulary = (RELEVANT_WORDS if relevant else OTHER_WORDS) + FILLER_WORDS
+        paragraphs = []
+        for p in range(self.paragraphs):
+            sentences = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(12, 24))).capitalize() + "." for _ in range(3)]
+            if relevant and p == 0:
+                project = source_id % self.projects
+                sentences.insert(0, f"O estado anunciou a {RELEVANT_PHRASES[project % len(RELEVANT_PHRASES)]} do lote {project}.")
+            paragraphs.append(" ".join(sentences))
+        return paragraphs
+
+    def html(self, article_id):
+        title = self.title(article_id)
+        paragraphs = "".join(f"<p>{p}</p>" for p in self.body(article_id))
+        return (
+            "<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'>"
+            f"<title>{title}</title><meta property='og:title' content='{title}'></head><body>"
+            "<nav><a href='/'>Início</a> <a href='/politica'>Política</a> <a href='/economia'>Economia</a></nav>"
+            "<div class='cookie-banner'>Usamos cookies para melhorar sua experiência. <button>Aceitar</button></div>"
+            f"<article><h1>{title}</h1><div class='article-body'>{paragraphs}</div></article>"
+            "<footer>© Portal de Notícias. Todos os direitos reservados.</footer></body></html>"
+        )
+
+
+class _ArticleSite(_HttpFake):
+    def __init__(self, farm, latency):
+        super().__init__(latency)
+        self.farm = farm
+
+    def handle(self, handler):
+        match = re.match(r"^/g\d+/noticias/(\d+)$", urlparse(handler.path).path)
+        if not match:
+            self._reply(handler, 404, "<html><body>Página não encontrada</body></html>", "text/html")
+            return
+        self._reply(handler, 200, self.farm.html(int(match.group(1))), "text/html")
+
+
+class FakeSerpApi(_HttpFake):
+    """
+    Endpoint /search no formato da SerpApi para os motores google_news e bing_news. Cada termo devolve
+    `results_per_search` notícias do ArticleFarm; `overlap` é a fração dos resultados do Bing que também
+    aparece no Google (mesma URL).
+    """
+
+    def __init__(self, farm, results_per_search=50, overlap=0.3, latency=0.2):
+        super().__init__(latency)
+        self.farm = farm
+        self.results_per_search = results_per_search
+        self.overlap = overlap
+
+    def _article_ids(self, engine, term):
+        base = (_stable_int(term) % 100000) * self.results_per_search * 2
+        shared = int(self.results_per_search * self.overlap)
+        if engine == "google_news":
+            return [base + i for i in range(self.results_per_search)]
+        return [base + i for i in range(shared)] + [base + self.results_per_search + i for i in range(self.results_per_search - shared)]
+
+    def handle(self, handler):
+        params = {key: values[0] for key, values in parse_qs(urlparse(handler.path).query).items()}
+        engine = params.get("engine")
+        term = params.get("q", "").replace(" when:1d", "")
+        if engine not in ("google_news", "bing_news") or not term:
+            self._reply(handler, 400, json.dumps({"error": "Unsupported engine or missing query."}))
+            return
+        # Só a primeira página tem resultados (a paginação do Bing para na página vazia)
+        ids = self._article_ids(engine, term) if int(params.get("first", 1)) <= 1 else []
+        now = datetime.now(timezone.utc)
+        if engine == "google_news":
+            results = {"news_results": [
+                {"title": self.farm.title(i), "link": self.farm.url(i), "source": {"name": f"Portal {i % 8}"},
+                 "date": now.strftime("%m/%d/%Y, %I:%M %p, +0000 UTC")}
+                for i in ids
+            ]}
+        else:
+            results = {"organic_results": [
+                {"title": self.farm.title(i), "link": self.farm.url(i), "source": f"Portal {i % 8}", "date": f"{1 + i % 20}h"}
+                for i in ids
+            ]}
+        if not ids:
+            results["error"] = "Google hasn't returned any results for this query."
+        self._reply(handler, 200, json.dumps(results, ensure_ascii=False))
+
+
+class FakeOpenAI(_HttpFake):
+    """
+    Endpoint /v1/chat/completions compatível com o SDK da OpenAI. Reconhece os prompts do projeto
+    (classificação individual e em lote, agrupamento e headline/resumo) e responde no formato esperado.
+    `rate_limit_ratio` é a fração de requisições respondidas com 429 (com Retry-After).
+    """
+
+    def __init__(self, latency=0.5, rate_limit_ratio=0.05, retry_after_ms=200):
+        super().__init__(latency)
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after_ms = retry_after_ms
+        self.rate_limited = 0
+
+    @staticmethod
+    def _relevance(text):
+        text = text.lower()
+        return 8 if any(phrase in text for phrase in RELEVANT_PHRASES) else 2
+
+    def _answer(self, prompt):
+        if "Cluster 1:" in prompt:
+            groups = []
+            for cluster in re.split(r"\nCluster \d+:\n", prompt)[1:]:
+                items = re.findall(r"ID: (\d+) \| (.*)", cluster)
+                if items:
+                    groups.append({"tema": " ".join(items[0][1].split()[:8]), "ids": [int(news_id) for news_id, _ in items]})
+            return json.dumps(groups, ensure_ascii=False)
+        if "HEADLINE |" in prompt:
+            return "HEADLINE | Governo avança com novos projetos de concessão\nRESUMO | " + " ".join(["O grupo reúne anúncios de editais e leilões."] * 6)
+        if "\nNotícias:\n" in prompt and "ID: " in prompt:
+            items = re.findall(r"ID: (\d+)\n(.*?)\n---", prompt, re.DOTALL)
+            return json.dumps([
+                {"id": int(news_id), "nota": self._relevance(text), "contexto": "Avaliação do benchmark offline."}
+                for news_id, text in items
+            ], ensure_ascii=False)
+        if "\nNotícia:\n" in prompt:
+            return json.dumps({"nota": self._relevance(prompt.split("\nNotícia:\n", 1)[1]), "contexto": "Avaliação do benchmark offline."})
+        return "ok"
+
+    def handle(self, handler):
+        if not urlparse(handler.path).path.endswith("/chat/completions"):
+            self._reply(handler, 404, json.dumps({"error": {"message": "Not found"}}))
+            return
+        request = json.loads(handler.rfile.read(int(handler.headers.get("Content-Length", 0))) or b"{}")
+        if random.random() < self.rate_limit_ratio:
+            with self._lock:
+                self.rate_limited += 1
+            self._reply(
+                handler, 429,
+                json.dumps({"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}),
+                headers={"retry-after-ms": str(self.retry_after_ms)},
+            )
+            return
+        prompt = "\n".join(m.get("content") or "" for m in request.get("messages", []))
+        content = self._answer(prompt)
+        prompt_tokens, completion_tokens = len(prompt) // 4 + 1, len(content) // 4 + 1
+        self._reply(handler, 200, json.dumps({
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", ""),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        }, ensure_ascii=False))
+
+
+class SmtpSink:
+    """
+    Servidor SMTP mínimo (sem TLS nem autenticação) que aceita e descarta as mensagens,
+    com `latency` segundos de espera por mensagem.
+    """
+
+    def __init__(self, latency=0.01):
+        self.latency = latency
+        self.messages = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self, host="127.0.0.1", port=0):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+            def handle(self):
+                self.reply("220 benchmark SMTP sink")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode("utf-8", "replace").strip().split(" ", 1)[0].upper()
+                    if command == "EHLO":
+                        self.reply("250-benchmark")
+                        self.reply("250 8BITMIME")
+                    elif command in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                        self.reply("250 OK")
+                    elif command == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                            pass
+                        if sink.latency:
+                            time.sleep(sink.latency)
+                        with sink._lock:
+                            sink.messages += 1
+                        self.reply("250 OK: queued")
+                    elif command == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="SmtpSink", daemon=True).start()
+        return self
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
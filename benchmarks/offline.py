@@ -0,0 +1,286 @@
+"""
+Benchmark offline do pipeline completo: sobe servidores locais no lugar da SerpApi, da OpenAI, dos
+sites de notícias e do SMTP (benchmarks/fakes.py), popula um Postgres de benchmark e executa o pipeline
+em streaming usado em produção (run_sync_pipeline), process_and_save_relevant_news e send_newsletter_email.
+Com --pipeline legacy (ou both) mede também o caminho em etapas separadas (process_news e
+classify_and_update_all), em um banco recriado para ele.
+Para cada etapa reporta duração (p50/p95 entre as repetições), vazão e a latência (p50/p95) das
+chamadas externas e do banco, e compara com a linha de base salva para detectar regressões.
+
+Uso: BENCHMARK_DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.offline [--terms N]
+     [--results-per-search N] [--recipients N] [--repeat N] [--pipeline streaming|legacy|both]
+     [--save-baseline] [--tolerance 0.25]
+
+O banco de BENCHMARK_DATABASE_URL é truncado a cada repetição: nunca use o banco de produção.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.fakes import RELEVANT_PHRASES, ArticleFarm, FakeOpenAI, FakeSerpApi, SmtpSink
+
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Tabelas esvaziadas a cada repetição (schema_migrations fica intacta)
+BENCHMARK_TABLES = [
+    "news_deliveries", "relevant_news", "raw_news_lsh", "raw_news_signatures", "raw_news",
+    "llm_cache", "search_cache", "search_watermarks", "filters", "recipients",
+]
+
+# Histogramas (app/config/metrics.py) reportados por etapa
+CALL_HISTOGRAMS = ["search_request_seconds", "extraction_seconds", "llm_request_seconds", "smtp_send_seconds", "db_statement_seconds"]
+
+# Etapa -> (consulta que conta os itens processados, unidade)
+STAGE_ITEMS = {
+    "pipeline em streaming": ("SELECT count(*) FROM raw_news WHERE is_relevant IS NOT NULL", "notícias"),
+    "busca e extração": ("SELECT count(*) FROM raw_news", "notícias"),
+    "classificação": ("SELECT count(*) FROM raw_news WHERE is_relevant IS NOT NULL", "notícias"),
+    "agrupamento": ("SELECT count(*) FROM relevant_news", "notícias"),
+    "disparo": ("SELECT count(DISTINCT recipient_email) FROM news_deliveries WHERE status = 'sent'", "e-mails"),
+}
+
+
+def _percentile(values, q):
+    # Nearest-rank: com poucas repetições o p95 é a pior execução
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _configure_environment(args, farm, serp, llm, sink, workdir):
+    """
+    Aponta a configuração da aplicação para os servidores locais. Precisa rodar antes de importar `app`,
+    que lê o ambiente na importação. Demais variáveis (limites, workers etc.) seguem o ambiente atual.
+    """
+    os.environ.update({
+        "DATABASE_URL": args.database_url,
+        "SERPAPI_BASE_URL": serp.base_url,
+        "OPENAI_BASE_URL": f"{llm.base_url}/v1",
+        "OPENAI_API_KEY": "benchmark",
+        "GOOGLE_NEWS_API_KEY": "benchmark",
+        "BING_NEWS_API_KEY": "benchmark",
+        "ALERTA_LICITACAO_API_KEY": "benchmark",
+        "MAIL_SMTP_HOST": sink.address[0],
+        "MAIL_SMTP_PORT": str(sink.address[1]),
+        "MAIL_SMTP_AUTH": "false",
+        "MAIL_SMTP_STARTTLS": "false",
+        "MAIL_FROM": "newsletter@benchmark.invalid",
+        "HTML_CACHE_DIR": os.path.join(workdir, "html"),
+        "METRICS_ENABLED": "false",
+    })
+
+
+def _reset_database(engine, args):
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {', '.join(BENCHMARK_TABLES)} RESTART IDENTITY CASCADE"))
+        terms = [f"{RELEVANT_PHRASES[i % len(RELEVANT_PHRASES)]} {i // len(RELEVANT_PHRASES) or ''}".strip() for i in range(args.terms)]
+        conn.execute(text("INSERT INTO filters (term) SELECT unnest(CAST(:terms AS TEXT[]))"), {"terms": terms})
+        conn.execute(
+            text("INSERT INTO recipients (name, email) SELECT 'Leitor ' || g, 'leitor' || g || '@benchmark.invalid' FROM generate_series(1, :n) AS g"),
+            {"n": args.recipients},
+        )
+
+
+def _reset_process_caches():
+    # Caches em memória que sobreviveriam entre as repetições (ids recomeçam após o TRUNCATE)
+    from app.services.newsletter_renderer import newsletter_renderer
+    from app.services.relevance_prefilter import load_prefilter
+
+    newsletter_renderer.clear()
+    load_prefilter.cache_clear()
+
+
+def _pipelines(choice):
+    """
+    Listas de etapas medidas, cada uma sobre um banco recém-populado. Com "both" o caminho legado
+    mede só busca/extração e classificação (agrupamento e disparo são os mesmos nos dois).
+    """
+    from app.services.email_sender import send_newsletter_email
+    from app.services.news_classifier import classify_and_update_all
+    from app.services.news_crawler import process_news
+    from app.services.news_grouping import process_and_save_relevant_news
+    from app.services.pipeline import run_sync_pipeline
+
+    downstream = [("agrupamento", process_and_save_relevant_news), ("disparo", send_newsletter_email)]
+    streaming = [("pipeline em streaming", run_sync_pipeline)] + downstream
+    legacy = [("busca e extração", process_news), ("classificação", classify_and_update_all)]
+    if choice == "streaming":
+        return [streaming]
+    if choice == "legacy":
+        return [legacy + downstream]
+    return [streaming, legacy]
+
+
+def _run_once(engine, stages):
+    from sqlalchemy import text
+
+    from app.config.database import unit_of_work
+    from app.config.metrics import metrics
+
+    results = {}
+    for name, function in stages:
+        metrics.reset()
+        started = time.perf_counter()
+        with unit_of_work():
+            function()
+        elapsed = time.perf_counter() - started
+        with engine.connect() as conn:
+            items = conn.execute(text(STAGE_ITEMS[name][0])).scalar()
+        histograms = metrics.snapshot()["histograms"]
+        results[name] = {
+            "seconds": elapsed,
+            "items": items,
+            # Com várias séries (ex.: por caminho de extração ou operação SQL) vale a pior delas
+            "calls": {
+                histogram: {
+                    "count": sum(s["count"] for s in histograms[histogram]),
+                    "p50": max(s["p50"] for s in histograms[histogram]),
+                    "p95": max(s["p95"] for s in histograms[histogram]),
+                }
+                for histogram in CALL_HISTOGRAMS
+                if histogram in histograms
+            },
+        }
+    return results
+
+
+def _summarize(runs):
+    summary = {}
+    for name in runs[0]:
+        seconds = [run[name]["seconds"] for run in runs]
+        items = statistics.median(run[name]["items"] for run in runs)
+        p50 = _percentile(seconds, 0.5)
+        calls = {}
+        for histogram in runs[-1][name]["calls"]:
+            samples = [run[name]["calls"][histogram] for run in runs if histogram in run[name]["calls"]]
+            calls[histogram] = {key: statistics.median(s[key] for s in samples) for key in ("count", "p50", "p95")}
+        summary[name] = {
+            "p50_seconds": round(p50, 3),
+            "p95_seconds": round(_percentile(seconds, 0.95), 3),
+            "items": items,
+            "unit": STAGE_ITEMS[name][1],
+            "throughput_per_second": round(items / p50, 2) if p50 else 0.0,
+            "calls": calls,
+        }
+    return summary
+
+
+def _print_summary(summary):
+    print(f"\n{'etapa':<18} {'p50':>9} {'p95':>9} {'itens':>9} {'vazão':>14}")
+    for name, stage in summary.items():
+        print(
+            f"{name:<18} {stage['p50_seconds']:>8.2f}s {stage['p95_seconds']:>8.2f}s {stage['items']:>9.0f} "
+            f"{stage['throughput_per_second']:>8.1f} {stage['unit']}/s"
+        )
+        for histogram, call in stage["calls"].items():
+            print(f"    {histogram:<26} {call['count']:>7.0f} chamadas | p50 {call['p50'] * 1000:7.1f} ms | p95 {call['p95'] * 1000:7.1f} ms")
+
+
+def _compare(summary, baseline, tolerance):
+    """
+    Retorna as regressões: etapas cuja duração mediana passou da linha de base além da tolerância.
+    """
+    regressions = []
+    for name, stage in summary.items():
+        reference = baseline["stages"].get(name)
+        if not reference or not reference["p50_seconds"]:
+            continue
+        change = stage["p50_seconds"] / reference["p50_seconds"] - 1
+        status = "❌" if change > tolerance else "✅"
+        print(f"{status} {name}: p50 {reference['p50_seconds']:.2f}s -> {stage['p50_seconds']:.2f}s ({change:+.0%})")
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("BENCHMARK_DATABASE_URL"), help="Postgres de benchmark (padrão: BENCHMARK_DATABASE_URL)")
+    parser.add_argument("--terms", type=int, default=20, help="Termos de busca (tabela filters)")
+    parser.add_argument("--results-per-search", type=int, default=50, help="Notícias por busca em cada motor")
+    parser.add_argument("--recipients", type=int, default=200, help="Destinatários da newsletter")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições do pipeline completo")
+    parser.add_argument("--pipeline", choices=["streaming", "legacy", "both"], default="both", help="Caminho medido: streaming (produção), legacy ou os dois")
+    parser.add_argument("--article-latency", type=float, default=0.05, help="Latência média dos sites de notícias (s)")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="Latência média da SerpApi (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="Latência média da OpenAI (s)")
+    parser.add_argument("--llm-429-ratio", type=float, default=0.05, help="Fração de respostas 429 da OpenAI")
+    parser.add_argument("--smtp-latency", type=float, default=0.02, help="Espera do SMTP por mensagem (s)")
+    parser.add_argument("--baseline", default="offline", help="Nome da linha de base em benchmarks/baselines")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava o resultado como nova linha de base")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Aumento máximo aceito da duração mediana por etapa")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("informe o Postgres de benchmark em BENCHMARK_DATABASE_URL ou --database-url (o banco é truncado).")
+
+    farm = ArticleFarm(latency=args.article_latency).start()
+    serp = FakeSerpApi(farm, results_per_search=args.results_per_search, latency=args.search_latency).start()
+    llm = FakeOpenAI(latency=args.llm_latency, rate_limit_ratio=args.llm_429_ratio).start()
+    sink = SmtpSink(latency=args.smtp_latency).start()
+    workdir = tempfile.mkdtemp(prefix="news-bot-benchmark-")
+    _configure_environment(args, farm, serp, llm, sink, workdir)
+
+    from app.config.database import engine
+    from app.database.migrations import apply_migrations
+
+    pipelines = _pipelines(args.pipeline)
+    scenario = {key: value for key, value in vars(args).items() if key not in ("database_url", "baseline", "save_baseline", "tolerance", "repeat")}
+
+    try:
+        apply_migrations()
+        runs = []
+        for repetition in range(args.repeat):
+            print(f"Repetição {repetition + 1}/{args.repeat}...")
+            results = {}
+            for number, stages in enumerate(pipelines):
+                # URLs novas a cada execução: o cache de HTML começa frio como em uma execução real
+                farm.generation = repetition * len(pipelines) + number
+                _reset_database(engine, args)
+                _reset_process_caches()
+                results.update(_run_once(engine, stages))
+            runs.append(results)
+    finally:
+        for server in (farm, serp, llm, sink):
+            server.stop()
+
+    summary = _summarize(runs)
+    _print_summary(summary)
+    print(f"\nServidores locais: {serp.requests} buscas, {farm.requests} páginas, {llm.requests} chamadas à IA ({llm.rate_limited} com 429), {sink.messages} e-mails.")
+
+    result = {"created_at": datetime.now().isoformat(timespec="seconds"), "scenario": scenario, "repeat": args.repeat, "stages": summary}
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    result_path = os.path.join(RESULTS_DIR, f"{args.baseline}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Resultado gravado em {result_path}.")
+
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.baseline}.json")
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Linha de base gravada em {baseline_path}.")
+        return 0
+    if not os.path.exists(baseline_path):
+        print("Sem linha de base para comparar (use --save-baseline).")
+        return 0
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("scenario") != scenario:
+        print(f"⚠️ Cenário diferente da linha de base ({baseline_path}); a comparação é só indicativa.")
+    regressions = _compare(summary, baseline, args.tolerance)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
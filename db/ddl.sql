@@ -1,3 +1,6 @@
+-- Esquema completo para bancos novos. Bancos existentes são atualizados pelas migrações
+-- versionadas em db/migrations (python -m app.database.migrations).
+
 -- 1. Tabela de Filtros
 CREATE TABLE filters (
     id SERIAL PRIMARY KEY,
@@ -21,11 +24,13 @@ CREATE TABLE raw_news (
     title TEXT NOT NULL,
     source VARCHAR(255),
     url TEXT UNIQUE NOT NULL, -- UNIQUE para evitar duplicidade na captura
+    canonical_url TEXT UNIQUE, -- URL canônica (sem rastreamento, AMP, redirecionamentos), usada na deduplicação
     search_engine VARCHAR(50),    -- 'google_news', 'bing_news', 'portal_compras'
     raw_content TEXT,
     is_relevant BOOLEAN, -- Definido pelo Serviço de Classificação, nota de relevancia >= 7
     relevance_score INT, -- Nota de relevância atribuída pela IA
     context TEXT, -- Contexto gerado pela IA
+    duplicate_of INT REFERENCES raw_news(id) ON DELETE SET NULL, -- Representante canônico quando a notícia é quase duplicada
     captured_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -43,4 +48,69 @@ CREATE TABLE relevant_news (
     last_sent_at TIMESTAMP,      -- Se NULL, ainda não foi enviada
     processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT fk_raw_news FOREIGN KEY (original_url) REFERENCES raw_news(url)
-);
\ No newline at end of file
+);
+
+-- 5. Cache de respostas da IA (evita pagar novamente por conteúdo já avaliado)
+CREATE TABLE llm_cache (
+    cache_key TEXT PRIMARY KEY,     -- sha256 de modelo + versão do prompt + conteúdo normalizado
+    payload TEXT NOT NULL,          -- Resposta já interpretada, em JSON
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_llm_cache_created_at ON llm_cache (created_at);
+CREATE INDEX idx_llm_cache_last_hit_at_key ON llm_cache (last_hit_at) INCLUDE (cache_key);
+
+
+-- 6. Assinaturas MinHash e índice LSH para detecção de quase duplicadas
+CREATE TABLE raw_news_signatures (
+    news_id INT PRIMARY KEY REFERENCES raw_news(id) ON DELETE CASCADE,
+    signature BYTEA NOT NULL -- Assinatura MinHash do raw_content
+);
+
+CREATE TABLE raw_news_lsh (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    news_id INT NOT NULL REFERENCES raw_news(id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, news_id)
+);
+
+
+-- 7. Cache de respostas da SerpApi (evita pagar novamente pela mesma busca em execuções próximas)
+CREATE TABLE search_cache (
+    cache_key TEXT PRIMARY KEY, -- sha256 de motor + parâmetros normalizados + janela de tempo
+    engine VARCHAR(50),
+    response TEXT NOT NULL,     -- Resposta da API em JSON
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+
+-- 8. Marcas d'água da busca incremental por termo e motor
+CREATE TABLE search_watermarks (
+    term TEXT NOT NULL,
+    engine VARCHAR(50) NOT NULL,
+    newest_published_at TIMESTAMP NOT NULL, -- Notícia mais recente já vista
+    boundary_urls TEXT[] NOT NULL DEFAULT '{}', -- URLs canônicas vistas na fronteira (janela de sobreposição)
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (term, engine)
+);
+
+
+-- 9. Índices parciais das consultas frequentes
+CREATE INDEX idx_raw_news_unclassified ON raw_news (id) WHERE is_relevant IS NULL AND raw_content IS NOT NULL;
+CREATE INDEX idx_raw_news_relevant_ungrouped ON raw_news (url) WHERE is_relevant = true AND duplicate_of IS NULL;
+CREATE INDEX idx_raw_news_duplicate_of ON raw_news (duplicate_of) WHERE duplicate_of IS NOT NULL;
+CREATE INDEX idx_relevant_news_to_send ON relevant_news (published_at DESC) WHERE status IN ('pending', 'error');
+CREATE INDEX idx_search_cache_created_at ON search_cache (created_at);
+
+
+-- 10. Entregas da newsletter por notícia e destinatário
+CREATE TABLE news_deliveries (
+    relevant_news_id INT NOT NULL REFERENCES relevant_news(id) ON DELETE CASCADE,
+    recipient_email VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL,  -- 'sent', 'error' (temporário) ou 'bounced' (recusa definitiva)
+    attempts INT NOT NULL DEFAULT 1, -- Execuções que tentaram entregar
+    last_error TEXT,              -- Última resposta de erro do servidor SMTP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (relevant_news_id, recipient_email)
+);
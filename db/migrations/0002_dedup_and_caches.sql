@@ -0,0 +1,41 @@
+-- Deduplicação por URL canônica e quase duplicadas, caches da IA e da SerpApi e marcas d'água da busca
+
+ALTER TABLE raw_news ADD COLUMN IF NOT EXISTS canonical_url TEXT UNIQUE;
+ALTER TABLE raw_news ADD COLUMN IF NOT EXISTS duplicate_of INT REFERENCES raw_news(id) ON DELETE SET NULL;
+
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit_at ON llm_cache (last_hit_at);
+
+CREATE TABLE IF NOT EXISTS raw_news_signatures (
+    news_id INT PRIMARY KEY REFERENCES raw_news(id) ON DELETE CASCADE,
+    signature BYTEA NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS raw_news_lsh (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    news_id INT NOT NULL REFERENCES raw_news(id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, news_id)
+);
+
+CREATE TABLE IF NOT EXISTS search_cache (
+    cache_key TEXT PRIMARY KEY,
+    engine VARCHAR(50),
+    response TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS search_watermarks (
+    term TEXT NOT NULL,
+    engine VARCHAR(50) NOT NULL,
+    newest_published_at TIMESTAMP NOT NULL,
+    boundary_urls TEXT[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (term, engine)
+);
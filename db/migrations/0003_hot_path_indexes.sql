@@ -0,0 +1,25 @@
+-- Índices parciais e de cobertura para as consultas mais frequentes de app/database
+
+-- Notícias ainda não classificadas (iter_unclassified_news), já na ordem de leitura
+CREATE INDEX IF NOT EXISTS idx_raw_news_unclassified ON raw_news (id)
+    WHERE is_relevant IS NULL AND raw_content IS NOT NULL;
+
+-- Relevantes ainda não agrupadas (get_relevant_news); a url alimenta o anti-join com relevant_news
+CREATE INDEX IF NOT EXISTS idx_raw_news_relevant_ungrouped ON raw_news (url)
+    WHERE is_relevant = true AND duplicate_of IS NULL;
+
+-- Quase duplicadas (copy_relevance_to_duplicates e o ON DELETE SET NULL de duplicate_of)
+CREATE INDEX IF NOT EXISTS idx_raw_news_duplicate_of ON raw_news (duplicate_of)
+    WHERE duplicate_of IS NOT NULL;
+
+-- Fila de envio da newsletter (get_news_to_sent)
+CREATE INDEX IF NOT EXISTS idx_relevant_news_to_send ON relevant_news (published_at DESC)
+    WHERE status IN ('pending', 'error');
+
+-- Limpeza do cache da IA: expiração por created_at e descarte dos menos usados só pelo índice (cobertura)
+CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_cache (created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit_at_key ON llm_cache (last_hit_at) INCLUDE (cache_key);
+DROP INDEX IF EXISTS idx_llm_cache_last_hit_at;
+
+-- Limpeza do cache da SerpApi
+CREATE INDEX IF NOT EXISTS idx_search_cache_created_at ON search_cache (created_at);
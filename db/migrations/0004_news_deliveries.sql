@@ -0,0 +1,11 @@
+-- Status de entrega da newsletter por notícia e destinatário (reenvio só para quem falhou)
+
+CREATE TABLE IF NOT EXISTS news_deliveries (
+    relevant_news_id INT NOT NULL REFERENCES relevant_news(id) ON DELETE CASCADE,
+    recipient_email VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    attempts INT NOT NULL DEFAULT 1,
+    last_error TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (relevant_news_id, recipient_email)
+);
@@ -0,0 +1,58 @@
+"""
+Preenche raw_news.canonical_url nas notícias gravadas antes da 0002 (a coluna foi criada vazia) e
+recalcula as URLs canônicas antigas com a regra atual de host (amp.folha.com.br -> folha.com.br,
+sem reduzir hosts como amp.com.br). Notícias cuja URL canônica já pertence a outra linha ficam como
+estão, para não violar o índice UNIQUE.
+"""
+from sqlalchemy import text
+
+from app.config.logs import logger
+from app.services.url_canonicalizer import canonicalize_url
+
+
+BATCH_SIZE = 1000
+
+
+def upgrade(conn):
+    updated = skipped = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, url, canonical_url FROM raw_news WHERE id > :last_id AND url IS NOT NULL ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        changes = {}
+        for news_id, url, current in rows:
+            canonical_url = canonicalize_url(url)
+            if canonical_url and canonical_url != current:
+                changes[news_id] = canonical_url
+        if not changes:
+            continue
+        taken = {
+            row[0] for row in conn.execute(
+                text("SELECT canonical_url FROM raw_news WHERE canonical_url = ANY(:urls)"),
+                {"urls": list(set(changes.values()))},
+            )
+        }
+        ids, urls = [], []
+        for news_id, canonical_url in changes.items():
+            if canonical_url in taken:
+                skipped += 1
+                continue
+            taken.add(canonical_url)
+            ids.append(news_id)
+            urls.append(canonical_url)
+        if ids:
+            conn.execute(
+                text("""
+                    UPDATE raw_news AS rn SET canonical_url = v.canonical_url
+                    FROM unnest(CAST(:ids AS INT[]), CAST(:urls AS TEXT[])) AS v (id, canonical_url)
+                    WHERE rn.id = v.id
+                """),
+                {"ids": ids, "urls": urls},
+            )
+            updated += len(ids)
+    logger.info(f"URLs canônicas preenchidas em {updated} notícias ({skipped} ignoradas por já pertencerem a outra notícia).")
@@ -1,31 +1,34 @@
 from app.config.logs import logger
-from app.config.database import test_connection
-from app.services.news_crawler import process_news
-from app.services.news_classifier import classify_and_update_all
+from app.config.metrics import metrics, metrics_run, parse_run_arguments
+from app.config.database import test_connection, unit_of_work
+from app.services.pipeline import run_sync_pipeline
 from app.services.news_grouping import process_and_save_relevant_news
 from app.services.email_sender import send_newsletter_email
 
 
 if __name__ == "__main__":
-    try:
-        print("\n==============================\nINICIANDO PIPELINE DE NOTÍCIAS\n==============================")
-        
-        connection = test_connection()
-        if connection is False:
-            raise Exception("Falha na conexão com o banco de dados.")
+    args = parse_run_arguments("Pipeline completo: busca, classificação, agrupamento e disparo da newsletter.")
+    with metrics_run("main", profile=args.profile):
+        try:
+            print("\n==============================\nINICIANDO PIPELINE DE NOTÍCIAS\n==============================")
 
-        print("\n=== ETAPA 1: Busca de notícias ===\n")
-        process_news()
+            connection = test_connection()
+            if connection is False:
+                raise Exception("Falha na conexão com o banco de dados.")
 
-        print("\n=== ETAPA 2: Classificação de notícias ===\n")
-        classify_and_update_all()
+            print("\n=== ETAPAS 1 e 2: Busca, extração, inserção e classificação de notícias (streaming) ===\n")
+            with metrics.stage("sincronização"):
+                run_sync_pipeline()
 
-        print("\n=== ETAPA 3: Agrupamento e inserção das notícias relevantes ===\n")
-        process_and_save_relevant_news()
+            print("\n=== ETAPA 3: Agrupamento e inserção das notícias relevantes ===\n")
+            with metrics.stage("agrupamento"), unit_of_work():
+                process_and_save_relevant_news()
 
-        print("\n=== ETAPA 4: Disparo de e-mail com resumos ===\n")
-        send_newsletter_email()
+            print("\n=== ETAPA 4: Disparo de e-mail com resumos ===\n")
+            with metrics.stage("disparo"), unit_of_work():
+                send_newsletter_email()
 
-        print("\n==============================\nPIPELINE FINALIZADO COM SUCESSO\n==============================\n")
-    except Exception as e:
-        logger.error(f"Erro ao rodar o bot de notícias: {e}\n")
+            print("\n==============================\nPIPELINE FINALIZADO COM SUCESSO\n==============================\n")
+        except Exception as e:
+            metrics.mark_failed()
+            logger.error(f"Erro ao rodar o bot de notícias: {e}\n")